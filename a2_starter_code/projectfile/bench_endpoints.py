@@ -0,0 +1,271 @@
+"""Endpoint benchmark: latency percentiles and throughput on a seeded dataset.
+
+Drives the home page, /events with a spread of filter combinations, event
+details, book_tickets and upcoming through the Flask test client: first one
+request at a time, then as a weighted mix from a pool of threads. Reports
+p50/p95/p99 latency and requests per second, and can save the results as a
+baseline or compare against one. Run from this folder with:
+
+    python bench_endpoints.py                          # small throwaway dataset
+    FLASK_SQLALCHEMY_DATABASE_URI=sqlite:////tmp/big.sqlite flask --app main seed-data
+    python bench_endpoints.py --database /tmp/big.sqlite --save baseline.json
+    python bench_endpoints.py --database /tmp/big.sqlite --compare baseline.json
+
+book_tickets writes, so a --database is copied first and never changed.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from urllib.parse import urlencode
+
+from sqlalchemy import func, select
+
+from website import create_app, db
+from website.models import Event, EventStatus, Order, Ticket
+
+# Small enough to seed in a few seconds; use `flask seed-data` for the real scale
+SMALL_DATASET = {"users": 2000, "events": 5000, "orders": 100_000, "comments": 20_000}
+
+EVENT_FILTERS = [
+    {},
+    {"genre": "grunge"},
+    {"genre": ["metal", "70s"], "location": "tivoli"},
+    {"status": "open", "max_price": "100"},
+    {"q": "pearl jam"},
+    {"q": "tribute", "status": "open", "genre": "classic"},
+]
+
+SAMPLE = 2000  # ids drawn at random for details, booking and logins
+
+
+def copy_database(source, target):
+    """Consistent copy through SQLite's backup API (picks up any WAL contents)."""
+    with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+        src.backup(dst)
+
+
+def seed_throwaway(path, seed):
+    from website.seeding import seed_database
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + path, "BCRYPT_LOG_ROUNDS": 4})
+    with app.app_context():
+        totals = seed_database(seed=seed, **SMALL_DATASET)
+    print(f"seeded {totals['events']:,} events, {totals['orders']:,} orders in {totals['seconds']:.1f}s")
+
+
+def load_pools(rng):
+    """Ids the scenarios pick from: any event, bookable tiers, and fans with upcoming orders."""
+    today = date.today()
+    event_ids = db.session.scalars(select(Event.id)).all()
+    bookable = db.session.execute(
+        select(Ticket.event_id, Ticket.id).join(Event)
+        .where(Event.status == EventStatus.OPEN, Event.event_date >= today)
+    ).all()
+    fans = db.session.scalars(
+        select(Order.user_id).join(Event).where(Event.event_date >= today)
+        .group_by(Order.user_id).having(func.count() > 1)
+    ).all()
+    if not (event_ids and bookable and fans):
+        sys.exit("The database needs events, bookable tickets and users with upcoming orders.")
+    return {
+        "events": rng.sample(event_ids, min(SAMPLE, len(event_ids))),
+        "tickets": rng.sample(bookable, min(SAMPLE, len(bookable))),
+        "fans": rng.sample(fans, min(SAMPLE, len(fans))),
+    }
+
+
+def scenarios(pools):
+    """name -> (weight in the concurrent mix, request(client, rng))."""
+    def get(path):
+        return lambda client, rng: client.get(path)
+
+    def details(client, rng):
+        return client.get(f"/details/{rng.choice(pools['events'])}")
+
+    def book(client, rng):
+        event_id, ticket_id = rng.choice(pools["tickets"])
+        return client.post(f"/book_tickets/{event_id}", data={f"ticket_{ticket_id}": 1})
+
+    named = {"index": (3, get("/"))}
+    for filters in EVENT_FILTERS:
+        query = urlencode(filters, doseq=True)
+        named["events" + ("?" + query if query else "")] = (1, get("/events?" + query))
+    named["details"] = (4, details)
+    named["book_tickets"] = (1, book)
+    named["upcoming"] = (2, get("/upcoming-event"))
+    return named
+
+
+def logged_in_client(app, user_id):
+    client = app.test_client()
+    client.get("/")  # let the one-off login reset run first
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+    return client
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarise(latencies, elapsed):
+    """Latencies in seconds -> ms percentiles plus throughput."""
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "p50": percentile(ordered, 0.50) * 1000,
+        "p95": percentile(ordered, 0.95) * 1000,
+        "p99": percentile(ordered, 0.99) * 1000,
+        "rps": len(ordered) / elapsed if elapsed else 0.0,
+    }
+
+
+def timed(request, client, rng):
+    started = time.perf_counter()
+    response = request(client, rng)
+    response.get_data()  # a streamed page is only rendered as its body is read
+    elapsed = time.perf_counter() - started
+    if response.status_code >= 400:
+        raise RuntimeError(f"HTTP {response.status_code}")
+    return elapsed
+
+
+def run_sequential(app, named, pools, requests, warmup, rng):
+    client = logged_in_client(app, rng.choice(pools["fans"]))
+    results = {}
+    for name, (_, request) in named.items():
+        for _ in range(warmup):
+            timed(request, client, rng)
+        started = time.perf_counter()
+        latencies = [timed(request, client, rng) for _ in range(requests)]
+        results[name] = summarise(latencies, time.perf_counter() - started)
+    return results
+
+
+def run_concurrent(app, named, pools, threads, duration, seed):
+    names = list(named)
+    weights = [named[name][0] for name in names]
+    latencies = {name: [] for name in names}
+    errors = []
+    lock = threading.Lock()
+    start_gate = threading.Barrier(threads + 1)  # logins happen before the clock starts
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        client = logged_in_client(app, pools["fans"][index % len(pools["fans"])])
+        mine = {name: [] for name in names}
+        failed = []
+        start_gate.wait()
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            try:
+                mine[name].append(timed(named[name][1], client, rng))
+            except Exception as error:
+                failed.append(f"{name}: {error}")
+        with lock:
+            for name in names:
+                latencies[name].extend(mine[name])
+            errors.extend(failed)
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    start_gate.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    results = {name: summarise(latencies[name], elapsed) for name in names if latencies[name]}
+    results["all"] = summarise([value for name in names for value in latencies[name]], elapsed)
+    results["all"]["errors"] = len(errors)
+    for message in errors[:5]:
+        print(f"  error: {message}")
+    return results
+
+
+def print_results(title, results):
+    print(f"\n{title}")
+    print(f"{'scenario':<52} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8}   (ms)")
+    for name, row in results.items():
+        print(f"{name:<52} {row['count']:>6} {row['p50']:>8.2f} {row['p95']:>8.2f} "
+              f"{row['p99']:>8.2f} {row['rps']:>8.1f}")
+
+
+def compare(baseline, current, tolerance):
+    """Print p95 and throughput changes; return the rows that regressed past tolerance."""
+    regressions = []
+    print(f"\nAgainst baseline (tolerance {tolerance:.0%})")
+    print(f"{'phase/scenario':<63} {'p95 was':>8} {'now':>8} {'req/s was':>10} {'now':>8}")
+    for phase in ("sequential", "concurrent"):
+        for name, row in current[phase].items():
+            old = baseline.get(phase, {}).get(name)
+            if not old:
+                continue
+            slower = row["p95"] > old["p95"] * (1 + tolerance)
+            fewer = row["rps"] < old["rps"] * (1 - tolerance)
+            flag = "  REGRESSED" if slower or fewer else ""
+            print(f"{phase + '/' + name:<63} {old['p95']:>8.2f} {row['p95']:>8.2f} "
+                  f"{old['rps']:>10.1f} {row['rps']:>8.1f}{flag}")
+            if flag:
+                regressions.append(f"{phase}/{name}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", help="seeded SQLite file (copied; default: seed a small one)")
+    parser.add_argument("--mode", choices=["production", "development"], default="production")
+    parser.add_argument("--requests", type=int, default=200, help="per scenario, sequential phase")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds, concurrent phase")
+    parser.add_argument("--seed", type=int, default=207)
+    parser.add_argument("--save", metavar="FILE", help="write the results here as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="baseline to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.sqlite")
+    if args.database:
+        copy_database(args.database, path)
+    else:
+        seed_throwaway(path, args.seed)
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + path, "PRODUCTION": args.mode == "production"})
+    rng = random.Random(args.seed)
+    with app.app_context():
+        pools = load_pools(rng)
+    named = scenarios(pools)
+
+    results = {
+        "config": {key: getattr(args, key) for key in ("database", "mode", "requests", "threads", "duration", "seed")},
+        "sequential": run_sequential(app, named, pools, args.requests, args.warmup, rng),
+        "concurrent": run_concurrent(app, named, pools, args.threads, args.duration, args.seed),
+    }
+    print_results("Sequential (one client)", results["sequential"])
+    print_results(f"Concurrent ({args.threads} threads, {args.duration:.0f}s mix)", results["concurrent"])
+
+    if args.save:
+        with open(args.save, "w") as handle:
+            json.dump(results, handle, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+    if args.compare:
+        with open(args.compare) as handle:
+            regressions = compare(json.load(handle), results, args.tolerance)
+        if regressions:
+            print("FAIL: " + ", ".join(regressions))
+            sys.exit(1)
+        print("OK: within tolerance")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Benchmark /events search: FTS5 index vs. the old leading-wildcard ilike path.
+
+Builds a throwaway SQLite database with synthetic events and times one page
+of results (--limit rows, soonest first) for a few search terms, through the
+old ilike path and through the FTS index as /events runs it. The ranked
+column times the opt-in ?sort=relevance order, which has to score and sort
+every match before it can take the first page. Run from this folder with:
+
+    python bench_search.py --events 500000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, time as dtime, timedelta
+
+from website import create_app, db
+from website.models import User, Event, EventStatus, Genre
+from website.search import match_expression, search_events
+
+BANDS = ["Pearl Jam", "Metallica", "Led Zeppelin", "The Doors", "Black Sabbath", "Nirvana",
+         "Soundgarden", "Fleetwood Mac", "Lynyrd Skynyrd", "Pink Floyd", "AC/DC", "Creedence"]
+KINDS = ["Tribute", "Live", "Revival", "Experience", "Anthology", "Unplugged"]
+VENUES = ["Brisbane Riverstage", "Fortitude Music Hall", "The Tivoli", "Eatons Hill",
+          "Sydney Opera House", "Rod Laver Arena", "Enmore Theatre", "The Triffid"]
+WORDS = ["loud", "electric", "acoustic", "legendary", "classic", "heavy", "riffs", "encore",
+         "anthems", "vinyl", "amplified", "psychedelic", "southern", "grunge", "night", "tour"]
+
+
+def populate(count, batch=10000):
+    rng = random.Random(207)
+    user = User(username="bench", email="bench@example.com", phone_number="0400000000",
+                password_hash="x")
+    db.session.add(user)
+    db.session.commit()
+
+    genres = list(Genre)
+    start = date.today()
+    rows = []
+    for i in range(count):
+        band = rng.choice(BANDS)
+        rows.append({
+            "title": f"{band} {rng.choice(KINDS)} {i}",
+            "attendees": 1000,
+            "event_date": start + timedelta(days=rng.randint(0, 720)),
+            "start_time": dtime(19, 0),
+            "end_time": dtime(23, 0),
+            "genre": rng.choice(genres),
+            "venue": rng.choice(VENUES),
+            "description": " ".join(rng.choice(WORDS) for _ in range(30)) + f" {band}",
+            "status": EventStatus.OPEN,
+            "tickets_sold": 0,
+            "user_id": user.id,
+        })
+        if len(rows) == batch:
+            db.session.execute(db.insert(Event), rows)
+            rows = []
+    if rows:
+        db.session.execute(db.insert(Event), rows)
+    db.session.commit()
+
+
+def time_query(build, repeats):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        results = db.session.execute(build()).all()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=50, help="rows per page of results")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench_search.sqlite")
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + db_path})
+
+    with app.app_context():
+        started = time.perf_counter()
+        populate(args.events)
+        print(f"Inserted {args.events} events (with FTS triggers) in {time.perf_counter() - started:.1f}s")
+
+        cases = [("zeppelin", ""), ("pearl ja", ""), ("legendary riffs", ""), ("", "tivoli"),
+                 ("metallica", "riverstage"), ("night", "")]  # "night" is in most descriptions
+        common = []
+        print(f"{'query':<34}{'ilike ms':>10}{'fts ms':>10}{'ranked ms':>11}{'ilike rows':>12}{'fts rows':>10}")
+        for search_query, location in cases:
+            def ilike_query():
+                query = db.select(Event.id)
+                if search_query:
+                    query = query.where(Event.title.ilike(f"%{search_query}%"))
+                if location:
+                    query = query.where(Event.venue.ilike(f"%{location}%"))
+                return query.order_by(Event.event_date, Event.id).limit(args.limit)
+
+            def fts_query(ranked=False):
+                query, sort_columns = search_events(
+                    db.select(Event.id), match_expression(search_query, location), ranked)
+                return query.order_by(*sort_columns).limit(args.limit)
+
+            ilike_ms, ilike_rows = time_query(ilike_query, args.repeats)
+            fts_ms, fts_rows = time_query(fts_query, args.repeats)
+            ranked_ms, _ = time_query(lambda: fts_query(ranked=True), args.repeats)
+            if ilike_rows == args.limit:
+                common.append((ilike_ms, fts_ms))
+            label = f"q={search_query!r} loc={location!r}"
+            print(f"{label:<34}{ilike_ms:>10.1f}{fts_ms:>10.1f}{ranked_ms:>11.1f}{ilike_rows:>12}{fts_rows:>10}")
+
+        # Terms common enough in titles that ilike fills a page early: its best case
+        if common:
+            ilike_ms, fts_ms = (sum(times) for times in zip(*common))
+            print(f"Common-term pages: ilike {ilike_ms:.1f} ms, fts {fts_ms:.1f} ms in total "
+                  f"({'no slower' if fts_ms <= ilike_ms else 'SLOWER'})")
+
+
+if __name__ == "__main__":
+    main()
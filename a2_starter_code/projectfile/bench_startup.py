@@ -0,0 +1,74 @@
+"""Cold-start benchmark: development vs. production config.
+
+Starts a fresh Python process per run and times importing the app,
+create_app() and the first render of a few pages, all against one
+throwaway SQLite database. Run from this folder with:
+
+    python bench_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PAGES = ("/", "/events", "/login")
+
+# Runs in the child process; prints one JSON line of timings in ms
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+from website import create_app
+imported = time.perf_counter()
+app = create_app(json.loads(sys.argv[1]))
+created = time.perf_counter()
+client = app.test_client()
+first = {}
+for page in json.loads(sys.argv[2]):
+    t = time.perf_counter()
+    status = client.get(page).status_code
+    assert status == 200, (page, status)
+    first[page] = (time.perf_counter() - t) * 1000
+print(json.dumps({
+    "import": (imported - started) * 1000,
+    "create_app": (created - imported) * 1000,
+    "first_requests": sum(first.values()),
+    "total": (time.perf_counter() - started) * 1000,
+}))
+"""
+
+
+def run_once(config):
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, json.dumps(config), json.dumps(PAGES)],
+        check=True, capture_output=True, text=True, env=env,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    uri = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "startup.sqlite")
+    modes = {
+        "development": {"SQLALCHEMY_DATABASE_URI": uri},
+        "production": {"SQLALCHEMY_DATABASE_URI": uri, "PRODUCTION": True},
+    }
+    run_once(modes["development"])  # creates the schema
+    run_once(modes["production"])  # writes the template bytecode cache
+
+    print(f"{'mode':<12} {'import':>8} {'create_app':>11} {'first pages':>12} {'total':>8}   (median ms)")
+    for mode, config in modes.items():
+        runs = [run_once(config) for _ in range(args.runs)]
+        medians = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        print(f"{mode:<12} {medians['import']:>8.1f} {medians['create_app']:>11.1f} "
+              f"{medians['first_requests']:>12.1f} {medians['total']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Transfer benchmark: time to first byte and bytes on the wire per page.
+
+Requests each page from a running server over real sockets, once without
+and once with Accept-Encoding, and reports median TTFB, total time and
+body size. Streaming and compression are off by default; compare them by
+restarting the server with FLASK_STREAM_PAGES=true and
+FLASK_COMPRESS_RESPONSES=true. Run from this folder with:
+
+    FLASK_STREAM_PAGES=true FLASK_COMPRESS_RESPONSES=true flask --app main run --port 5000 &
+    python bench_transfer.py
+    python bench_transfer.py --url http://127.0.0.1:5000 / "/events?per_page=100"
+"""
+import argparse
+import http.client
+import statistics
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = ["/", "/events", "/events?per_page=100"]
+ENCODINGS = ["identity", "gzip", "br"]
+
+
+def fetch(host, port, path, encoding):
+    """(ttfb seconds, total seconds, body bytes, Content-Encoding) for one request."""
+    connection = http.client.HTTPConnection(host, port)
+    try:
+        started = time.perf_counter()
+        connection.request("GET", path, headers={"Accept-Encoding": encoding})
+        response = connection.getresponse()
+        first = response.read(1)
+        first_byte = time.perf_counter()
+        body = first + response.read()
+        finished = time.perf_counter()
+        if response.status >= 400:
+            raise RuntimeError(f"{path} returned HTTP {response.status}")
+        return first_byte - started, finished - started, len(body), response.getheader("Content-Encoding")
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=DEFAULT_PATHS)
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="running server")
+    parser.add_argument("--requests", type=int, default=20, help="per page and encoding")
+    args = parser.parse_args()
+    server = urlsplit(args.url)
+
+    print(f"{'page':<32} {'asked':<9} {'sent':<9} {'ttfb':>8} {'total':>8} {'bytes':>9}   (ms)")
+    for path in args.paths:
+        for encoding in ENCODINGS:
+            runs = [fetch(server.hostname, server.port or 80, path, encoding) for _ in range(args.requests)]
+            ttfb = statistics.median(run[0] for run in runs) * 1000
+            total = statistics.median(run[1] for run in runs) * 1000
+            size, sent = runs[-1][2], runs[-1][3] or "identity"
+            print(f"{path:<32} {encoding:<9} {sent:<9} {ttfb:8.2f} {total:8.2f} {size:9,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Multi-threaded booking load test.
+
+Fires concurrent buyers at a single event in a throwaway SQLite database and
+checks that no tickets are oversold. Run from this folder with:
+
+    python loadtest_booking.py --threads 16 --capacity 500 --buyers 2000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from website import create_app, db
+from website.booking import BookingRejected, book_event_tickets
+from website.models import User, Event, EventStatus, Ticket, Order
+
+
+def setup_event(capacity):
+    user = User(username="loadtest", email="loadtest@example.com", phone_number="0400000000",
+                password_hash="x")
+    db.session.add(user)
+    db.session.flush()
+    event = Event(
+        title="Load Test Live",
+        attendees=capacity,
+        event_date=(datetime.now() + timedelta(days=30)).date(),
+        start_time=datetime.strptime("19:00", "%H:%M").time(),
+        end_time=datetime.strptime("23:00", "%H:%M").time(),
+        venue="Test Arena",
+        user_id=user.id,
+    )
+    db.session.add(event)
+    db.session.flush()
+    db.session.add_all([
+        Ticket(ticket_type="General", price=80.0, event_id=event.id),
+        Ticket(ticket_type="VIP", price=250.0, event_id=event.id),
+    ])
+    db.session.commit()
+    return user.id, event.id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--capacity", type=int, default=500)
+    parser.add_argument("--buyers", type=int, default=2000, help="total booking attempts")
+    parser.add_argument("--max-qty", type=int, default=4)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "loadtest.sqlite")
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + db_path})
+
+    with app.app_context():
+        user_id, event_id = setup_event(args.capacity)
+        ticket_ids = [t.id for t in Ticket.query.filter_by(event_id=event_id)]
+
+    attempts = iter(range(args.buyers))
+    attempts_lock = threading.Lock()
+    stats = {"booked": 0, "tickets": 0, "rejected": 0, "errors": 0}
+    stats_lock = threading.Lock()
+
+    def buyer():
+        with app.app_context():
+            tickets = {t.id: t for t in Ticket.query.filter(Ticket.id.in_(ticket_ids))}
+            while True:
+                with attempts_lock:
+                    if next(attempts, None) is None:
+                        return
+                ticket = tickets[random.choice(ticket_ids)]
+                qty = random.randint(1, args.max_qty)
+                outcome, booked = "booked", qty
+                try:
+                    book_event_tickets(event_id, user_id, {ticket: qty})
+                except BookingRejected:
+                    outcome, booked = "rejected", 0
+                except Exception:
+                    db.session.rollback()
+                    outcome, booked = "errors", 0
+                with stats_lock:
+                    stats[outcome] += 1
+                    stats["tickets"] += booked
+
+    threads = [threading.Thread(target=buyer) for _ in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        event = db.session.get(Event, event_id)
+        ordered = db.session.scalar(
+            db.select(func.coalesce(func.sum(Order.quantity), 0)).where(Order.event_id == event_id)
+        )
+        tier_total = db.session.scalar(
+            db.select(func.sum(Ticket.tickets_sold)).where(Ticket.event_id == event_id)
+        )
+
+        print(f"threads={args.threads} attempts={args.buyers} capacity={args.capacity}")
+        print(f"bookings={stats['booked']} rejected={stats['rejected']} errors={stats['errors']}")
+        print(f"elapsed={elapsed:.2f}s throughput={stats['booked'] / elapsed:.1f} bookings/sec")
+        print(f"tickets_sold={event.tickets_sold} orders_total={ordered} tiers_total={tier_total} "
+              f"status={event.status.name}")
+
+        failures = []
+        if event.tickets_sold > args.capacity:
+            failures.append("oversold")
+        if not (event.tickets_sold == ordered == tier_total == stats["tickets"]):
+            failures.append("counters disagree with orders")
+        if event.tickets_sold == args.capacity and event.status != EventStatus.SOLD_OUT:
+            failures.append("full event not marked SOLD_OUT")
+
+    if failures:
+        print("FAIL: " + ", ".join(failures))
+        sys.exit(1)
+    print("OK: zero oversell")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,16 @@
+import os
+
 from website import create_app
+from website.sweeper import start_status_sweeper
 
 app = create_app()
 
 if __name__ == "__main__":
-    # Runs the app in debug mode
-    app.run(debug=True, host="0.0.0.0", port=5000)
+    # Debug mode (off under FLASK_PRODUCTION=true) brings the auto-reloader with it
+    reloading = app.debug
+
+    # Only sweep from the reloader's child process, not the file watcher
+    if not reloading or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_status_sweeper(app, interval=app.config["STATUS_SWEEP_INTERVAL"])
+
+    app.run(debug=app.debug, use_reloader=reloading, host="0.0.0.0", port=5000)
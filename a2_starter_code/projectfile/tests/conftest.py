@@ -0,0 +1,128 @@
+"""Shared fixtures: an app on a throwaway SQLite database per test.
+
+Run from the projectfile folder with:
+
+    python -m pytest
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from website import create_app, db
+from website.models import User, Event, EventImage, Ticket, Comment, Order
+
+ROWS = 25  # per relationship on the seeded event pages, enough that N+1 loading shows
+
+
+@pytest.fixture
+def app_config():
+    """Extra config for the app fixture; override in a test module to change it."""
+    return {}
+
+
+@pytest.fixture
+def app(tmp_path, app_config):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + str(tmp_path / "test.sqlite"),
+        "WTF_CSRF_ENABLED": False,
+        **app_config,
+    })
+    yield app
+    _reset_process_caches()
+
+
+def _reset_process_caches():
+    """Drop the per-process caches, which would otherwise outlive each test's database."""
+    from website import catalogue
+    from website.homepage import homepage_cache
+    from website.identity import user_cache
+    from website.waiting_room import waiting_room
+
+    user_cache.clear()
+    homepage_cache.invalidate()
+    waiting_room.reset()
+    with catalogue._cubes_lock:
+        catalogue._cubes.clear()
+
+
+@pytest.fixture
+def app_context(app):
+    """An app context around the test body. Requests made from it share its session, so
+    tests that count queries push a fresh context per request instead."""
+    with app.app_context():
+        yield
+
+
+@pytest.fixture
+def organiser(app_context):
+    user = User(username="organiser", email="organiser@example.com", phone_number="0400000000",
+                password_hash="x")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def make_event(organiser):
+    """Factory for committed events, dated a month out unless told otherwise."""
+    def make_event(title="Show", venue="The Tivoli", days=30, **columns):
+        columns.setdefault("attendees", 1000)
+        event = Event(title=title, venue=venue, user_id=organiser.id,
+                      event_date=(datetime.now() + timedelta(days=days)).date(),
+                      start_time=datetime.strptime("19:00", "%H:%M").time(),
+                      end_time=datetime.strptime("23:00", "%H:%M").time(), **columns)
+        db.session.add(event)
+        db.session.commit()
+        return event
+    return make_event
+
+
+def seed_event_pages():
+    """An upcoming and a past event, each with ROWS images, ticket tiers, orders and comments.
+
+    Returns (id of the user who placed the orders, {"upcoming": id, "past": id}).
+    """
+    users = [User(username=f"fan{i}", email=f"fan{i}@example.com", phone_number="0400000000",
+                  password_hash="x") for i in range(ROWS)]
+    db.session.add_all(users)
+    db.session.flush()
+
+    event_ids = {}
+    for name, offset in (("upcoming", 30), ("past", -30)):
+        event = Event(title=f"{name} show", attendees=10000, comment_count=ROWS,
+                      event_date=(datetime.now() + timedelta(days=offset)).date(),
+                      start_time=datetime.strptime("19:00", "%H:%M").time(),
+                      end_time=datetime.strptime("23:00", "%H:%M").time(),
+                      venue="The Tivoli", user_id=users[0].id)
+        db.session.add(event)
+        db.session.flush()
+        tickets = [Ticket(ticket_type=f"Tier {i}", price=50.0 + i, event_id=event.id) for i in range(ROWS)]
+        db.session.add_all(tickets)
+        db.session.add_all(EventImage(event_id=event.id, filename=f"img{i}.jpg") for i in range(ROWS))
+        db.session.flush()
+        for i, user in enumerate(users):
+            db.session.add(Comment(content=f"comment {i}", user_id=user.id, event_id=event.id))
+            db.session.add(Order(price=tickets[i].price, quantity=1, user_id=users[0].id,
+                                 event_id=event.id, ticket_id=tickets[i].id))
+        event_ids[name] = event.id
+    db.session.commit()
+    return users[0].id, event_ids
+
+
+@pytest.fixture
+def event_pages(app):
+    """(user id, event ids) from seed_event_pages(), seeded in a context of its own."""
+    with app.app_context():
+        return seed_event_pages()
+
+
+@pytest.fixture
+def member_client(app, event_pages):
+    """A test client signed in as the user who placed the seeded orders."""
+    client = app.test_client()
+    client.get("/").get_data()  # let the one-off login reset run first
+    with client.session_transaction() as session:
+        session["_user_id"] = str(event_pages[0])
+        session["_fresh"] = True
+    client.get("/").get_data()  # warm the user identity cache, as any earlier page view would
+    return client
@@ -0,0 +1,67 @@
+import pytest
+
+from website import db
+from website.booking import book_event_tickets
+from website.models import Ticket
+
+
+@pytest.fixture
+def api_event(make_event):
+    event = make_event("Arena Tour", attendees=50)
+    ticket = Ticket(ticket_type="General", price=60.0, event_id=event.id)
+    db.session.add(ticket)
+    db.session.commit()
+    return event, ticket
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    client.get("/").get_data()  # let the one-off login reset run first
+    return client
+
+
+def etags(client, event_id):
+    """Current ETags of the detail, tickets and list endpoints for one event."""
+    urls = [f"/api/v1/events/{event_id}", f"/api/v1/events/{event_id}/tickets", "/api/v1/events"]
+    responses = [client.get(url) for url in urls]
+    assert all(response.status_code == 200 for response in responses)
+    return [response.headers["ETag"] for response in responses]
+
+
+@pytest.mark.parametrize("url", ["/api/v1/events/{event_id}", "/api/v1/events/{event_id}/tickets", "/api/v1/events"])
+def test_matching_if_none_match_is_not_modified(client, api_event, url):
+    url = url.format(event_id=api_event[0].id)
+    etag = client.get(url).headers["ETag"]
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.get_data() == b""
+
+
+def test_booking_changes_every_etag(client, api_event):
+    event, ticket = api_event
+    before = etags(client, event.id)
+
+    book_event_tickets(event.id, event.user_id, {ticket: 2})
+
+    after = etags(client, event.id)
+    assert all(old != new for old, new in zip(before, after))
+    stale = client.get(f"/api/v1/events/{event.id}", headers={"If-None-Match": before[0]})
+    assert stale.status_code == 200
+    assert stale.get_json()["tickets_sold"] == 2
+
+
+def test_edit_changes_every_etag(client, api_event):
+    event, _ticket = api_event
+    before = etags(client, event.id)
+
+    event.title = "Arena Tour (Second Night)"
+    db.session.commit()
+
+    after = etags(client, event.id)
+    assert all(old != new for old, new in zip(before, after))
+    listing = client.get("/api/v1/events", headers={"If-None-Match": before[2]})
+    assert listing.status_code == 200
+    assert listing.get_json()["events"][0]["title"] == "Arena Tour (Second Night)"
@@ -0,0 +1,67 @@
+import os
+
+from flask import url_for
+
+from website import assets, create_app
+
+
+def make_app(tmp_path):
+    return create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + str(tmp_path / "test.sqlite")})
+
+
+def static_files(folder):
+    return {
+        os.path.join(root, name): os.stat(os.path.join(root, name)).st_mtime_ns
+        for root, _dirs, files in os.walk(folder) for name in files
+    }
+
+
+def test_startup_without_manifest_writes_nothing_and_serves_plain_urls(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, "manifest_path", lambda app: str(tmp_path / "missing.json"))
+    static_folder = os.path.join(os.path.dirname(assets.__file__), "static")
+    before = static_files(static_folder)
+    built = []
+    monkeypatch.setattr(assets, "precompress_static", lambda *args, **kwargs: built.append(args))
+
+    app = make_app(tmp_path)
+
+    assert built == []  # only `flask build-assets` compresses
+
+    assert static_files(static_folder) == before
+    with app.test_request_context():
+        assert url_for("static", filename="style/main.css") == "/static/style/main.css"
+    assert app.test_client().get("/static/style/main.css").status_code == 200
+
+
+def test_startup_with_manifest_fingerprints_urls(tmp_path, monkeypatch):
+    manifest = str(tmp_path / "static-manifest.json")
+    monkeypatch.setattr(assets, "manifest_path", lambda app: manifest)
+    static_folder = os.path.join(os.path.dirname(assets.__file__), "static")
+    assets.write_manifest(static_folder, manifest)
+
+    app = make_app(tmp_path)
+
+    digest = assets.file_digest(os.path.join(static_folder, "style", "main.css"))
+    with app.test_request_context():
+        url = url_for("static", filename="style/main.css")
+    assert url == f"/static/style/main.{digest}.css"
+    response = app.test_client().get(url)
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == assets.IMMUTABLE
+
+
+def test_files_outside_the_manifest_stay_unversioned_without_hashing(tmp_path, monkeypatch):
+    manifest = str(tmp_path / "static-manifest.json")
+    monkeypatch.setattr(assets, "manifest_path", lambda app: manifest)
+    static_folder = os.path.join(os.path.dirname(assets.__file__), "static")
+    assets.write_manifest(static_folder, manifest)
+    app = make_app(tmp_path)
+
+    def no_disk(path):
+        raise AssertionError(f"url_for touched {path}")
+    monkeypatch.setattr(assets, "file_digest", no_disk)
+    monkeypatch.setattr(assets.os, "stat", no_disk)
+
+    with app.test_request_context():
+        assert url_for("static", filename="uploads/new-upload.jpg") == "/static/uploads/new-upload.jpg"
+        assert url_for("static", filename="style/main.css").startswith("/static/style/main.")
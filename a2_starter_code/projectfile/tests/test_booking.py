@@ -0,0 +1,112 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from website import booking, db
+from website.booking import (
+    BookingRejected, book_event_tickets, cancel_order_tickets, release_event_capacity,
+    reserve_event_capacity,
+)
+from website.models import EventStatus, Order, Ticket
+
+
+@pytest.fixture
+def small_event(make_event):
+    """A five-seat event with one $80 tier."""
+    event = make_event("Intimate Gig", attendees=5)
+    ticket = Ticket(ticket_type="General", price=80.0, event_id=event.id)
+    db.session.add(ticket)
+    db.session.commit()
+    return event, ticket
+
+
+def refreshed(*rows):
+    for row in rows:
+        db.session.refresh(row)
+    return rows
+
+
+def test_reserve_at_capacity_fails_without_writing(small_event):
+    event, ticket = small_event
+    assert reserve_event_capacity(event.id, 4)
+    db.session.commit()
+    refreshed(event)
+    version = event.version
+
+    assert not reserve_event_capacity(event.id, 2)
+    db.session.commit()
+    refreshed(event)
+    assert (event.tickets_sold, event.status, event.version) == (4, EventStatus.OPEN, version)
+
+    with pytest.raises(BookingRejected):
+        book_event_tickets(event.id, event.user_id, {ticket: 2})
+    refreshed(event, ticket)
+    assert (event.tickets_sold, ticket.tickets_sold) == (4, 0)
+    assert db.session.scalar(db.select(db.func.count(Order.id))) == 0
+
+
+def test_sold_out_flip_and_reopen_on_release(small_event):
+    event, ticket = small_event
+    book_event_tickets(event.id, event.user_id, {ticket: 5})
+    refreshed(event)
+    assert (event.tickets_sold, event.status) == (5, EventStatus.SOLD_OUT)
+    assert not reserve_event_capacity(event.id, 1)
+
+    release_event_capacity(event.id, ticket.id, 2)
+    db.session.commit()
+    refreshed(event, ticket)
+    assert (event.tickets_sold, event.status, ticket.tickets_sold) == (3, EventStatus.OPEN, 3)
+    assert reserve_event_capacity(event.id, 2)
+
+
+def test_past_event_takes_no_bookings(make_event):
+    event = make_event("Last Month", days=-30)
+    assert not reserve_event_capacity(event.id, 1)
+
+
+def test_partial_then_full_cancel_adjusts_counters(small_event):
+    event, ticket = small_event
+    book_event_tickets(event.id, event.user_id, {ticket: 3})
+    order = db.session.scalars(db.select(Order)).one()
+
+    cancel_order_tickets(order, 1)
+    refreshed(event, ticket, order)
+    assert (order.quantity, order.price) == (2, 160.0)
+    assert (event.tickets_sold, ticket.tickets_sold) == (2, 2)
+
+    with pytest.raises(BookingRejected):
+        cancel_order_tickets(order, 3)
+
+    order_id = order.id
+    cancel_order_tickets(order, 2)
+    assert db.session.scalar(db.select(Order).filter_by(id=order_id)) is None
+    refreshed(event, ticket)
+    assert (event.tickets_sold, ticket.tickets_sold) == (0, 0)
+
+
+def test_lock_conflicts_are_retried(app_context, monkeypatch):
+    monkeypatch.setattr(booking.time, "sleep", lambda seconds: None)
+    attempts = []
+
+    def locked_twice():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise OperationalError("UPDATE events", {}, Exception("database is locked"))
+        return "booked"
+
+    assert booking._run_with_retry(locked_twice) == "booked"
+    assert len(attempts) == 3
+
+    def always_locked():
+        raise OperationalError("UPDATE events", {}, Exception("database is locked"))
+
+    with pytest.raises(OperationalError):
+        booking._run_with_retry(always_locked)
+
+    def broken():
+        attempts.append(1)
+        raise OperationalError("UPDATE events", {}, Exception("no such column: x"))
+
+    attempts.clear()
+    with pytest.raises(OperationalError):
+        booking._run_with_retry(broken)
+    assert len(attempts) == 1  # only lock conflicts are retried
@@ -0,0 +1,54 @@
+import gzip
+
+import pytest
+
+
+@pytest.fixture
+def app_config():
+    return {"QUERY_DEBUG_VIEW": True, "HOMEPAGE_CACHE_SECONDS": 0, "FACET_CACHE_SECONDS": 0}
+
+
+def recorded(client):
+    return client.get("/_debug/queries").get_json()["requests"][0]
+
+
+def test_streaming_and_compression_are_opt_in(tmp_path):
+    from website import create_app
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + str(tmp_path / "test.sqlite")})
+    assert not app.config["STREAM_PAGES"]
+    assert not app.config["COMPRESS_RESPONSES"]
+
+    response = app.test_client().get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert "Server-Timing" in response.headers  # headers wait for the whole page
+
+
+def test_streamed_page_still_records_its_queries(app, event_pages):
+    client = app.test_client()
+    client.get("/events?genre=Rock").get_data()  # warm the per-process lookups
+    client.get("/events?genre=Rock").get_data()
+    expected = recorded(client)
+
+    app.config["STREAM_PAGES"] = True
+    streamed = client.get("/events?genre=Rock")
+    streamed.get_data()
+    streamed.close()  # as the server does once the body is sent
+
+    entry = recorded(client)
+    assert entry["path"] == "/events?genre=Rock"
+    assert "Server-Timing" not in streamed.headers
+    assert entry["queries"] == expected["queries"] > 0
+
+
+def test_compression_when_enabled(tmp_path):
+    from website import create_app
+
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + str(tmp_path / "test.sqlite"),
+        "COMPRESS_RESPONSES": True,
+        "COMPRESS_MIN_SIZE": 0,
+    })
+    response = app.test_client().get("/events", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert b"</html>" in gzip.decompress(response.get_data())
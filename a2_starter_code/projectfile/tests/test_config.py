@@ -0,0 +1,23 @@
+import pytest
+
+from website import create_app
+
+
+def make_app(tmp_path, **config):
+    return create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + str(tmp_path / "test.sqlite"), **config})
+
+
+def test_development_debugs_and_reloads_templates(tmp_path):
+    app = make_app(tmp_path)
+    assert app.debug
+    assert app.jinja_env.auto_reload
+
+
+@pytest.mark.parametrize("config", [
+    {"PRODUCTION": True, "AUTO_CREATE_SCHEMA": True},
+    {"DEBUG": False},
+], ids=["production", "debug off"])
+def test_debug_and_template_reloading_follow_config(tmp_path, config):
+    app = make_app(tmp_path, **config)
+    assert not app.debug
+    assert not app.jinja_env.auto_reload
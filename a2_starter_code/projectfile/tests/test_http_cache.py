@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from website import http_cache
+
+
+@pytest.fixture
+def app_config():
+    return {"FACET_CACHE_SECONDS": 0}  # keep the facet window out of these validators
+
+
+@pytest.fixture
+def next_day(monkeypatch):
+    """Move the validators' clock one day on, as if the page were revalidated after midnight."""
+    class NextDay(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.now(tz) + timedelta(days=1)
+
+    return lambda: monkeypatch.setattr(http_cache, "datetime", NextDay)
+
+
+def revalidate(client, url, last_modified):
+    """GET with only If-Modified-Since, as clients that ignore ETags do."""
+    return client.get(url, headers={"If-Modified-Since": last_modified})
+
+
+@pytest.mark.parametrize("url", ["/events", "/details/{event_id}"])
+def test_if_modified_since_alone_sees_the_date_rollover(app, make_event, next_day, url):
+    url = url.format(event_id=make_event("Tonight's show", days=0).id)
+    client = app.test_client()
+    client.get("/").get_data()  # let the one-off login reset run first
+
+    first = client.get(url)
+    first.get_data()
+    last_modified = first.headers["Last-Modified"]
+    assert revalidate(client, url, last_modified).status_code == 304
+
+    # After midnight the show is past and the catalogue's upcoming set changes
+    next_day()
+    response = revalidate(client, url, last_modified)
+    response.get_data()
+    assert response.status_code == 200
+    assert response.last_modified > first.last_modified
+    assert revalidate(client, url, response.headers["Last-Modified"]).status_code == 304
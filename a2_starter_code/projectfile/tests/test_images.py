@@ -0,0 +1,39 @@
+from website.images import image_attrs, image_source
+
+
+def candidates(srcset):
+    return [entry.split()[0] for entry in srcset.split(", ")]
+
+
+def attribute(markup, name):
+    return str(markup).split(f'{name}="', 1)[1].split('"', 1)[0]
+
+
+def test_img_srcset_lists_only_jpeg_variants(app):
+    with app.test_request_context():
+        attrs = image_attrs("band.png", "variants/band-ab12", "card")
+
+    assert candidates(attribute(attrs, "srcset")) == [
+        "/static/uploads/variants/band-ab12-card-320.jpg",
+        "/static/uploads/variants/band-ab12-card-640.jpg",
+    ]
+    assert attribute(attrs, "src") == "/static/uploads/variants/band-ab12-card-640.jpg"
+
+
+def test_webp_source_only_once_variants_exist(app):
+    with app.test_request_context():
+        source = image_source("variants/band-ab12", "detail")
+        assert image_source(None, "detail") == ""
+
+    assert str(source).startswith('<source type="image/webp"')
+    assert all(url.endswith(".webp") for url in candidates(attribute(source, "srcset")))
+
+
+def test_cards_wrap_variants_in_picture(app, make_event, app_context):
+    make_event(photo="band.png", photo_variant="variants/band-ab12")
+
+    html = app.test_client().get("/").get_data(as_text=True)
+
+    picture = html.split("<picture>", 1)[1].split("</picture>", 1)[0]
+    assert picture.lstrip().startswith('<source type="image/webp"')
+    assert "band-ab12-card-320.jpg" in attribute(picture.split("<img", 1)[1], "srcset")
@@ -0,0 +1,52 @@
+import threading
+import time
+
+import bcrypt
+import pytest
+
+from website import db, passwords
+from website.auth import BUSY_RETRY_AFTER
+from website.models import User
+
+
+@pytest.fixture
+def app_config():
+    return {"BCRYPT_LOG_ROUNDS": 4, "PASSWORD_HASH_TIMEOUT": 0.05}
+
+
+def test_login_gets_503_when_the_hash_outlasts_the_timeout(app, monkeypatch):
+    with app.app_context():
+        db.session.add(User(username="fan", email="fan@example.com", phone_number="0400000000",
+                            password_hash=bcrypt.hashpw(b"secret", bcrypt.gensalt(4)).decode()))
+        db.session.commit()
+
+    release = threading.Event()
+    check = bcrypt.checkpw
+
+    def slow_checkpw(password, hashed):
+        release.wait(5)
+        return check(password, hashed)
+
+    monkeypatch.setattr(bcrypt, "checkpw", slow_checkpw)
+    client = app.test_client()
+    client.get("/").get_data()  # let the one-off login reset run first
+    with app.app_context():
+        before = passwords.hash_metrics()
+
+    response = client.post("/login", data={"user_name": "fan", "password": "secret"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(BUSY_RETRY_AFTER)
+    with app.app_context():
+        assert passwords.hash_metrics()["timed_out"] == before["timed_out"] + 1
+
+    # The abandoned hash keeps its pool slot until it really finishes
+    release.set()
+    monkeypatch.setattr(bcrypt, "checkpw", check)
+    response = client.post("/login", data={"user_name": "fan", "password": "secret"})
+    assert response.status_code == 302
+    with app.app_context():
+        for _ in range(100):
+            if passwords.hash_metrics()["in_flight"] == before["in_flight"]:
+                break
+            time.sleep(0.01)
+        assert passwords.hash_metrics()["in_flight"] == before["in_flight"]
@@ -0,0 +1,31 @@
+"""Query-count budgets for the event pages.
+
+The seeded pages have many images, ticket tiers, orders and comments, but the
+budgets don't depend on row counts, so an N+1 regression fails immediately.
+Run just these from the projectfile folder with:
+
+    python -m pytest tests/test_query_budgets.py
+"""
+import pytest
+
+from website.querycount import assert_max_queries
+
+# endpoint path template -> maximum statements per request
+BUDGETS = {
+    "/details/{upcoming}": 3,        # event, images, tickets
+    "/event/{upcoming}/comments": 1, # one page of comments+authors
+    "/event/{upcoming}": 4,          # event, images, tickets, user orders
+    "/upcoming-event": 1,            # orders+events+tickets
+    "/event/history": 1,             # orders+events+tickets
+    "/update-event/sales?event_id={upcoming}": 4,  # per event, the event, per tier, per day
+}
+
+
+@pytest.mark.parametrize("path, budget", BUDGETS.items(), ids=list(BUDGETS))
+def test_page_stays_within_query_budget(app, event_pages, member_client, path, budget):
+    url = path.format(**event_pages[1])
+    with app.app_context():
+        with assert_max_queries(budget, url):
+            response = member_client.get(url)
+            response.get_data()  # streamed pages render (and query) as the body is read
+    assert response.status_code == 200
@@ -0,0 +1,155 @@
+"""Query plans for the hot lookups.
+
+Each hot request runs against the seeded event pages, then every SELECT,
+UPDATE and DELETE it actually issued goes through EXPLAIN QUERY PLAN with
+its real parameters. A plan that reads a table with a full scan instead of
+an index fails the test, so a dropped or missing index fails the suite.
+Signed-out requests are checked too, along with the 304 revalidation that
+runs only the cached_page validators.
+"""
+import re
+
+import pytest
+
+from website import db
+from website.models import Ticket
+from website.querycount import capture_statements
+
+# (method, path template, form data template)
+HOT_REQUESTS = [
+    ("GET", "/", None),
+    ("GET", "/events", None),
+    ("GET", "/events?genre=Rock&status=Open", None),
+    ("GET", "/events?q=show", None),
+    ("GET", "/events?q=show&sort=relevance", None),
+    ("GET", "/previous-events", None),
+    ("GET", "/details/{upcoming}", None),
+    ("GET", "/event/{upcoming}", None),
+    ("GET", "/event/{upcoming}/comments", None),
+    ("GET", "/upcoming-event", None),
+    ("GET", "/event/history", None),
+    ("GET", "/update-event/sales?event_id={upcoming}", None),
+    ("GET", "/api/v1/events?status=Open", None),
+    ("GET", "/api/v1/events/{upcoming}", None),
+    ("GET", "/api/v1/events/{upcoming}/tickets", None),
+    ("POST", "/book_tickets/{upcoming}", {"ticket_{ticket}": "1"}),
+    ("POST", "/event/{upcoming}/comment", {"content": "See you there"}),
+]
+
+# Signed out: public pages answer conditional GETs from the version columns
+ANONYMOUS_REQUESTS = [
+    "/",
+    "/events",
+    "/events?genre=Rock&status=Open",
+    "/events?q=show",
+    "/details/{upcoming}",
+    "/api/v1/events?status=Open",
+    "/api/v1/events/{upcoming}",
+]
+
+# `SCAN <table>` with no index is a full table read; scans of FTS virtual
+# tables, subqueries, constant rows and the schema catalogue are fine
+SCAN = re.compile(r"^SCAN (?P<table>\w+)(?P<rest>.*)$")
+INDEXED = re.compile(r"USING (COVERING )?INDEX|VIRTUAL TABLE")
+CHECKED = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+def full_scans(connection, statement, parameters):
+    rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    scans = []
+    for row in rows:
+        detail = row[-1]
+        match = SCAN.match(detail)
+        if not match or INDEXED.search(match["rest"]):
+            continue
+        if match["table"] not in ("CONSTANT", "events_fts", "sqlite_master") and not match["table"].startswith("anon_"):
+            scans.append(detail)
+    return scans + rewound_tables(connection, statement, parameters)
+
+
+def rewound_tables(connection, statement, parameters):
+    """Tables the bytecode walks from the first row.
+
+    EXPLAIN QUERY PLAN reports max(column) with no index behind it as a bare
+    `SEARCH <table>`, the same as a max(id) that reads one row. The bytecode
+    tells them apart: a full read opens the table itself and Rewinds it.
+    """
+    tables = dict(connection.exec_driver_sql(
+        "SELECT rootpage, name FROM sqlite_master WHERE type = 'table'"
+    ).all())
+    opened, rewound = {}, []
+    for _addr, opcode, p1, p2, _p3, p4, *_rest in connection.exec_driver_sql("EXPLAIN " + statement, parameters):
+        # Index cursors carry a KeyInfo ("k(...)") in p4; table cursors a column count
+        if opcode in ("OpenRead", "OpenWrite") and p2 in tables and not str(p4).startswith("k("):
+            opened[p1] = tables[p2]
+        elif opcode == "Rewind" and opened.get(p1) not in (None, "sqlite_master"):
+            rewound.append(f"REWIND {opened[p1]}")
+    return rewound
+
+
+@pytest.fixture
+def app_config():
+    return {
+        "HOMEPAGE_CACHE_SECONDS": 0,  # rebuild the shelves so their queries get checked
+        "FACET_CACHE_SECONDS": 0,  # and the /events facet counts
+    }
+
+
+def indexless_statements(captured):
+    """Plans among the captured statements that read a table without an index."""
+    problems = []
+    connection = db.session.connection()
+    for statement, parameters in captured:
+        if not statement.lstrip().upper().startswith(CHECKED):
+            continue
+        for detail in full_scans(connection, statement, parameters):
+            problems.append(f"{detail}\n    in: {' '.join(statement.split())}")
+    db.session.rollback()
+    return problems
+
+
+@pytest.mark.parametrize("method, path, form", HOT_REQUESTS, ids=[f"{m} {p}" for m, p, _ in HOT_REQUESTS])
+def test_hot_request_uses_indexes(app, event_pages, member_client, method, path, form):
+    event_ids = event_pages[1]
+    with app.app_context():
+        ticket_id = db.session.scalar(db.select(Ticket.id).filter_by(event_id=event_ids["upcoming"]).limit(1))
+    url = path.format(**event_ids)
+    data = {key.format(ticket=ticket_id): value for key, value in (form or {}).items()}
+
+    with app.app_context():
+        with capture_statements() as captured:
+            response = member_client.open(url, method=method, data=data)
+            response.get_data()  # streamed pages render (and query) as the body is read
+        assert response.status_code < 400
+        problems = indexless_statements(captured)
+    assert captured
+    assert not problems, "\n".join(problems)
+
+
+@pytest.mark.parametrize("facet_seconds", [0, 30], ids=["uncached facets", "facet window"])
+@pytest.mark.parametrize("path", ANONYMOUS_REQUESTS)
+def test_anonymous_request_and_revalidation_use_indexes(app, event_pages, path, facet_seconds):
+    """Signed-out pages go through the cached_page validators, then a 304 runs only those."""
+    app.config["FACET_CACHE_SECONDS"] = facet_seconds
+    url = path.format(**event_pages[1])
+    client = app.test_client()
+
+    with app.app_context():
+        with capture_statements() as captured:
+            response = client.get(url)
+            response.get_data()
+        assert response.status_code == 200
+        problems = indexless_statements(captured)
+    assert captured
+    assert not problems, "\n".join(problems)
+
+    etag = response.headers.get("ETag")
+    if etag is None:
+        return  # the homepage is served from its snapshot, without validators
+    with app.app_context():
+        with capture_statements() as captured:
+            revalidated = client.get(url, headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304
+        problems = indexless_statements(captured)
+    assert captured  # the validators themselves still query
+    assert not problems, "\n".join(problems)
@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from website import db
+from website.models import Event
+from website.pagination import keyset_page
+from website.search import create_search_index, match_expression, search_events
+
+
+def search(search_query="", location="", ranked=False):
+    """Matching event ids in the order the search returns them."""
+    query, sort_columns = search_events(Event.query, match_expression(search_query, location), ranked)
+    return [event.id for event in query.order_by(*sort_columns)]
+
+
+def test_match_expression_quotes_prefix_terms():
+    assert match_expression("pearl ja") == '("pearl"* "ja"*)'
+    assert match_expression("metallica", "riverstage") == '("metallica"*) AND venue : ("riverstage"*)'
+    assert match_expression("", "the tivoli") == 'venue : ("the"* "tivoli"*)'
+    assert match_expression('  "; drop', "") == '("drop"*)'
+    assert match_expression("", "") == ""
+
+
+def test_matches_come_soonest_first(make_event):
+    later = make_event("Led Zeppelin Tribute", days=40)
+    sooner = make_event("Zeppelin Revival", days=10)
+    make_event("Metallica Revival", days=5)
+
+    assert search("zeppelin") == [sooner.id, later.id]
+    assert search("revival") == [event.id for event in Event.query.filter(Event.title.like("%Revival%"))
+                                 .order_by(Event.event_date, Event.id)]
+
+
+def test_ranked_matches_find_title_description_and_venue(make_event):
+    zeppelin = make_event("Led Zeppelin Tribute", venue="Brisbane Riverstage", days=40)
+    doors = make_event("The Doors Live", description="a zeppelin-heavy encore", venue="The Tivoli", days=10)
+    make_event("Metallica Revival", venue="The Triffid")
+
+    assert search("zeppelin", ranked=True) == [zeppelin.id, doors.id]  # the title hit outranks the description one
+    assert search("zep", ranked=True) == [zeppelin.id, doors.id]
+    assert search("zeppelin") == [doors.id, zeppelin.id]
+    assert search("", "tivoli") == [doors.id]
+    assert search("zeppelin", "riverstage") == [zeppelin.id]
+    assert search("nirvana") == []
+
+
+def test_search_results_page_by_keyset(make_event):
+    events = [make_event(f"Grunge Night {i}", days=30 - i) for i in range(5)]
+    expected = [event.id for event in reversed(events)]
+    query, sort_columns = search_events(Event.query, match_expression("grunge"))
+
+    seen, cursor = [], None
+    while True:
+        page = keyset_page(query, sort_columns, cursor=cursor, per_page=2)
+        seen += [event.id for event in page.items]
+        cursor = page.next_cursor
+        if not cursor:
+            break
+    assert seen == expected
+
+
+def test_triggers_keep_index_in_sync(make_event):
+    event = make_event("Pearl Jam Anthology", days=20)
+    other = make_event("Soundgarden Live", days=10)
+    assert search("pearl") == [event.id]
+
+    event.title = "Soundgarden Anthology"
+    db.session.commit()
+    assert search("pearl") == []
+    assert search("soundgarden") == [other.id, event.id]
+
+    event.event_date = other.event_date - timedelta(days=1)
+    db.session.commit()
+    assert search("soundgarden") == [event.id, other.id]  # re-keyed to its new date
+
+    event.tickets_sold = 5  # not an indexed column
+    db.session.commit()
+    assert search("soundgarden") == [event.id, other.id]
+
+    db.session.delete(event)
+    db.session.commit()
+    assert search("soundgarden") == [other.id]
+    assert search("anthology") == []
+
+
+def test_index_keyed_by_event_id_is_rebuilt(make_event):
+    event = make_event("Fleetwood Mac Unplugged")
+    # An index from before search_key: rowid = event id
+    for trigger in ("events_fts_ai", "events_fts_ad", "events_fts_au"):
+        db.session.execute(text(f"DROP TRIGGER {trigger}"))
+    db.session.execute(text("DROP TABLE events_fts"))
+    db.session.execute(text(
+        "CREATE VIRTUAL TABLE events_fts USING fts5(title, description, venue, genre, "
+        "content='events', content_rowid='id')"
+    ))
+    db.session.execute(text("INSERT INTO events_fts(events_fts) VALUES ('rebuild')"))
+
+    create_search_index()
+    db.session.commit()
+    assert search("fleetwood") == [event.id]
+    later = make_event("Fleetwood Mac Revival", days=60)
+    assert search("fleetwood") == [event.id, later.id]
@@ -0,0 +1,115 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from itsdangerous import URLSafeSerializer
+
+from website import db, waiting_room
+from website.models import Event, Order, Ticket, User
+
+# Requests here run outside any test app context: one held open would be
+# shared with them, and Flask-Login caches the signed-in user on its g.
+
+QUEUED = "You're in the queue"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Stand-in for the waiting room's time module, moved on by hand."""
+    class Clock:
+        now = time.time()
+
+        def time(self):
+            return self.now
+
+    clock = Clock()
+    monkeypatch.setattr(waiting_room, "time", clock)
+    return clock
+
+
+def add_user(name):
+    user = User(username=name, email=f"{name}@example.com", phone_number="0400000000", password_hash="x")
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+@pytest.fixture
+def queued_event(app):
+    """(event id, ticket id) for an on-sale event admitting one buyer a minute."""
+    with app.app_context():
+        event = Event(title="Reunion Tour", venue="The Tivoli", user_id=add_user("organiser"), attendees=100,
+                      event_date=(datetime.now() + timedelta(days=30)).date(),
+                      start_time=datetime.strptime("19:00", "%H:%M").time(),
+                      end_time=datetime.strptime("23:00", "%H:%M").time(), admission_rate=1)
+        db.session.add(event)
+        db.session.commit()
+        ticket = Ticket(ticket_type="General", price=120.0, event_id=event.id)
+        db.session.add(ticket)
+        db.session.commit()
+        return event.id, ticket.id
+
+
+@pytest.fixture
+def buyer(app):
+    """Factory for (test client, user id), each signed in as a new user."""
+    def buyer(name):
+        with app.app_context():
+            user_id = add_user(name)
+        client = app.test_client()
+        client.get("/").get_data()  # let the one-off login reset run first
+        with client.session_transaction() as session:
+            session["_user_id"] = str(user_id)
+            session["_fresh"] = True
+        return client, user_id
+    return buyer
+
+
+def book(app, client, event_id, ticket_id):
+    """Try to buy one ticket; returns how many orders the event then has."""
+    client.post(f"/book_tickets/{event_id}", data={f"ticket_{ticket_id}": "1"})
+    with app.app_context():
+        return db.session.scalar(db.select(db.func.count(Order.id)).filter_by(event_id=event_id))
+
+
+def token_of(client, event_id):
+    with client.session_transaction() as session:
+        return session[waiting_room.SESSION_KEY][str(event_id)]
+
+
+def status(client, event_id, token):
+    return client.get(f"/waiting-room/{event_id}/status", query_string={"token": token}).get_json()
+
+
+def test_unadmitted_buyer_is_refused_until_their_slot(app, buyer, queued_event, clock):
+    event_id, ticket_id = queued_event
+    first, _ = buyer("first")
+    second, _ = buyer("second")
+
+    assert QUEUED not in first.get(f"/event/{event_id}").get_data(as_text=True)  # empty room: straight in
+    assert QUEUED in second.get(f"/event/{event_id}").get_data(as_text=True)
+    assert status(second, event_id, token_of(second, event_id)) == {"state": "waiting", "wait_seconds": 60, "ahead": 1}
+
+    assert book(app, second, event_id, ticket_id) == 0
+    assert book(app, first, event_id, ticket_id) == 1
+
+    clock.now += 60  # the second slot comes up
+    assert status(second, event_id, token_of(second, event_id))["state"] == "admitted"
+    assert book(app, second, event_id, ticket_id) == 2
+
+
+def test_forged_and_expired_tokens_are_not_admitted(app, buyer, queued_event, clock):
+    event_id, ticket_id = queued_event
+    client, user_id = buyer("holder")
+    client.get(f"/event/{event_id}").get_data()
+    token = token_of(client, event_id)
+    assert status(client, event_id, token)["state"] == "admitted"
+
+    forged = URLSafeSerializer("not the secret", salt="waiting-room").dumps([event_id, user_id, 0, clock.now, 1])
+    for bad in (forged, token[:-2] + "xx", "garbage"):
+        assert status(client, event_id, bad)["state"] == "invalid"
+    assert status(client, event_id + 1, token)["state"] == "invalid"  # another event's queue
+
+    clock.now += app.config["WAITING_ROOM_ADMISSION_SECONDS"] + 1
+    assert status(client, event_id, token)["state"] == "invalid"
+    assert book(app, client, event_id, ticket_id) == 0
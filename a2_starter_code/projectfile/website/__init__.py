@@ -1,42 +1,125 @@
 import os
+import time
 from flask import Flask, session
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, logout_user
 from flask_bootstrap5 import Bootstrap
 
+from .database import RoutingSession
+
 # create a global SQLAlchemy object
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
-def create_app():
+def create_app(test_config=None):
+    started = time.perf_counter()
     app = Flask(__name__, instance_relative_config=True, template_folder="templates")
-    app.debug = True
     app.secret_key = "somesecretkey"
 
     # Absolute path to the database in the instance folder
     os.makedirs(app.instance_path, exist_ok=True)
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(app.instance_path, 'sitedata.sqlite')
-    print("DB path:", os.path.join(app.instance_path, 'sitedata.sqlite'))
-    app.config['TEMPLATES_AUTO_RELOAD'] = True
+    # "production" turns on WAL and friends and sends GET queries to a read-only pool
+    app.config["DB_PROFILE"] = "development"
+    app.config["DB_READ_URI"] = None  # defaults to SQLALCHEMY_DATABASE_URI
+    # PRODUCTION (e.g. FLASK_PRODUCTION=true) turns off debug and template reloading, skips
+    # schema creation at import (run `flask db-upgrade` on deploy instead) and compiles
+    # templates up front into an on-disk bytecode cache. The None settings follow PRODUCTION.
+    app.config["PRODUCTION"] = False
+    app.config["DEBUG"] = None  # e.g. FLASK_DEBUG=false to run development without it
+    app.config["AUTO_CREATE_SCHEMA"] = None
+    app.config["TEMPLATE_BYTECODE_CACHE"] = None
+    app.config["PRECOMPILE_TEMPLATES"] = None
+    app.config['TEMPLATES_AUTO_RELOAD'] = None  # None = reload when debugging
     app.config["UPLOAD_FOLDER"] = os.path.join(app.root_path, "static", "uploads")
+    app.config["IMAGE_WORKERS"] = 2  # background threads resizing uploads; 0 = resize inline
+    app.config["STATIC_FINGERPRINT"] = True  # content-hashed, immutable /static URLs
+    # Both opt-in, e.g. FLASK_COMPRESS_RESPONSES=true when no proxy in front compresses
+    app.config["COMPRESS_RESPONSES"] = False  # gzip/br pages and JSON
+    app.config["COMPRESS_MIN_SIZE"] = 1024  # bytes; smaller bodies aren't worth the CPU
+    app.config["STREAM_PAGES"] = False  # large listing pages flush their head before rendering the rest
+    app.config["HOMEPAGE_CACHE_SECONDS"] = 60
+    app.config["FACET_CACHE_SECONDS"] = 30  # whole-catalogue /events facet counts
+    # Anonymous /events and /details pages: shared caches may reuse them for MAX_AGE
+    # seconds, then serve them stale for up to STALE_SECONDS while revalidating
+    app.config["PUBLIC_PAGE_MAX_AGE"] = 10
+    app.config["PUBLIC_PAGE_STALE_SECONDS"] = 60
+    app.config["STATUS_SWEEP_INTERVAL"] = 3600  # seconds between background status sweeps
+
+    # Waiting room for events with an admission_rate: how long an admitted buyer
+    # may keep booking, and how often the queue page polls for its turn
+    app.config["WAITING_ROOM_ADMISSION_SECONDS"] = 600
+    app.config["WAITING_ROOM_POLL_SECONDS"] = 5
+
+    # Password hashing runs on its own small pool; logins past WORKERS + QUEUE, or
+    # still waiting for their hash after TIMEOUT seconds, get a 503
+    app.config["BCRYPT_LOG_ROUNDS"] = 12  # existing hashes are upgraded on the next login
+    app.config["PASSWORD_HASH_WORKERS"] = 2
+    app.config["PASSWORD_HASH_QUEUE"] = 8
+    app.config["PASSWORD_HASH_TIMEOUT"] = 5
+
+    # Logged-in user identities cached per process, dropped when the user row changes
+    app.config["USER_CACHE_SIZE"] = 1024
+    app.config["USER_CACHE_SECONDS"] = 300
+
+    # SQL instrumentation: statements slower than SLOW_QUERY_MS go to the slow-query log,
+    # and /_debug/queries (off unless QUERY_DEBUG_VIEW) lists the last QUERY_LOG_SIZE requests.
+    # QUERY_DEBUG_VIEW also enables /_debug/password-hashing
+    app.config["SLOW_QUERY_MS"] = 100
+    app.config["SQL_TOP_STATEMENTS"] = 3
+    app.config["QUERY_LOG_SIZE"] = 50
+    app.config["QUERY_DEBUG_VIEW"] = False
+
+    # Environment overrides, e.g. FLASK_SQLALCHEMY_DATABASE_URI or FLASK_DB_PROFILE=production
+    app.config.from_prefixed_env()
+
+    # Let scripts such as loadtest_booking.py point the app at another database
+    if test_config:
+        app.config.update(test_config)
+
+    production = app.config["PRODUCTION"]
+    # Set through config, not app.debug, which would build the Jinja env (and fix
+    # its auto_reload) before TEMPLATES_AUTO_RELOAD has been read
+    if app.config["DEBUG"] is None:
+        app.config["DEBUG"] = not production
+    for key in ("TEMPLATE_BYTECODE_CACHE", "PRECOMPILE_TEMPLATES"):
+        if app.config[key] is None:
+            app.config[key] = production
+    if app.config["AUTO_CREATE_SCHEMA"] is None:
+        app.config["AUTO_CREATE_SCHEMA"] = not production
+    if not production:
+        print("DB:", app.config["SQLALCHEMY_DATABASE_URI"], f"({app.config['DB_PROFILE']} profile)")
 
     # Initialize extensions
+    from .database import configure_database, init_database
+    configure_database(app)
     db.init_app(app)
+    with app.app_context():
+        init_database(app, db)
     Bootstrap(app)
 
-    with app.app_context():
-        print("Creating tables if they do not exist...")
-        db.create_all()
-        print("Tables are ready!")
+    from .instrumentation import init_instrumentation
+    init_instrumentation(app)
+
+    from .passwords import init_passwords
+    init_passwords(app)
+
+    if app.config["AUTO_CREATE_SCHEMA"]:
+        with app.app_context():
+            print("Creating tables if they do not exist...")
+            from .migrations import create_schema
+            for version, description in create_schema():
+                print(f"Applied migration {version}: {description}")
+            print("Tables are ready!")
 
     login_manager = LoginManager()
     login_manager.login_view = 'auth.login'
     login_manager.init_app(app)
 
-    # User loader for Flask-Login
-    from .models import User
-    @login_manager.user_loader
-    def load_user(user_id):
-        return db.session.scalar(db.select(User).where(User.id == user_id))
+    # User loader for Flask-Login, served from a per-process identity cache
+    from .identity import load_user
+    login_manager.user_loader(load_user)
+
+    from . import versioning, pricing  # registers the event version and min_price hooks
 
     @app.before_request
     def clear_login_once():
@@ -58,6 +141,27 @@ def create_app():
     from . import event
     app.register_blueprint(event.event_bp)
 
+    from . import api
+    app.register_blueprint(api.api_bp)
+
     from . import models
 
-    return app
\ No newline at end of file
+    from .assets import init_assets
+    init_assets(app)
+
+    from .compression import init_compression
+    init_compression(app)
+
+    from .images import image_attrs, image_source
+    app.jinja_env.globals["image_attrs"] = image_attrs
+    app.jinja_env.globals["image_source"] = image_source
+
+    from .commands import register_commands
+    register_commands(app)
+
+    from .templating import init_templates
+    init_templates(app)
+
+    app.extensions["startup_seconds"] = time.perf_counter() - started
+    app.logger.info("App created in %.1f ms", app.extensions["startup_seconds"] * 1000)
+    return app
@@ -0,0 +1,147 @@
+import hashlib
+
+from flask import Blueprint, jsonify, make_response, request, url_for
+from sqlalchemy.orm import selectinload
+
+from .catalogue import filtered_events
+from .http_cache import event_state
+from .models import Event, EventStatus, EVENT_PAGE_LOADS
+from .pagination import keyset_page, page_url, requested_page_size
+
+
+# Read-only JSON API for the mobile client and partner aggregators.
+# Breaking changes go in a new blueprint under /api/v2.
+api_bp = Blueprint("api", __name__, url_prefix="/api/v1")
+
+# Clients may keep responses, but must revalidate them (cheaply, via ETag) before reuse
+CACHE_CONTROL = "no-cache"
+
+
+def _not_modified(etag, last_modified=None):
+    return _cache_headers(make_response("", 304), etag, last_modified)
+
+
+def _cache_headers(response, etag, last_modified=None):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
+
+
+def _conditional(payload, etag, last_modified=None):
+    """JSON response with validators; a matching If-None-Match becomes a 304."""
+    response = _cache_headers(jsonify(payload), etag, last_modified)
+    return response.make_conditional(request)
+
+
+def _isoformat_utc(moment):
+    return moment.isoformat() + "Z" if moment else None
+
+
+def _static_url(filename):
+    return url_for("static", filename="uploads/" + filename, _external=True) if filename else None
+
+
+def _available(event):
+    """Seats anyone can still buy: 0 once closed or past, None when unlimited."""
+    if event.current_status != EventStatus.OPEN:
+        return 0
+    return event.tickets_left
+
+
+def _event_summary(event):
+    return {
+        "id": event.id,
+        "version": event.version,
+        "title": event.title,
+        "event_date": event.event_date.isoformat(),
+        "venue": event.venue,
+        "genre": event.genre.value if event.genre else None,
+        "status": event.current_status.value,
+        "photo_url": _static_url(event.photo),
+        "url": url_for("api.event_detail", event_id=event.id, _external=True),
+    }
+
+
+def _ticket_tiers(event):
+    available = _available(event)
+    return [
+        {
+            "id": ticket.id,
+            "type": ticket.ticket_type,
+            "price": ticket.price,
+            "sold": ticket.tickets_sold,
+            "available": available,
+        }
+        for ticket in sorted(event.tickets, key=lambda ticket: ticket.id)
+    ]
+
+
+@api_bp.route("/events")
+def list_events():
+    """Catalogue listing: the /events filters (and ?sort=relevance), keyset-paginated with ?cursor=."""
+    query, sort_columns = filtered_events(request.args)
+    page = keyset_page(query, sort_columns, cursor=request.args.get("cursor"),
+                       per_page=requested_page_size())
+
+    # The page is only as fresh as the events on it (and where it sits in the listing)
+    fingerprint = hashlib.sha1(repr((
+        [(event.id, event.version, event.is_past) for event in page.items],
+        page.next_cursor, page.prev_cursor,
+    )).encode()).hexdigest()
+    payload = {
+        "events": [_event_summary(event) for event in page.items],
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+        "next_url": page_url("api.list_events", page.next_cursor),
+        "prev_url": page_url("api.list_events", page.prev_cursor),
+    }
+    return _conditional(payload, f"events-{fingerprint}")
+
+
+@api_bp.route("/events/<int:event_id>")
+def event_detail(event_id):
+    etag, last_modified = event_state(event_id)
+    if request.if_none_match.contains_weak(etag):  # compressed responses carry it weak
+        return _not_modified(etag, last_modified)
+
+    event = Event.query.options(*EVENT_PAGE_LOADS).filter_by(id=event_id).first_or_404()
+    payload = _event_summary(event)
+    payload.update({
+        "description": event.description,
+        "organisation": event.organisation.value if event.organisation else None,
+        "start_time": event.start_time.isoformat(timespec="minutes"),
+        "end_time": event.end_time.isoformat(timespec="minutes"),
+        "capacity": event.attendees,
+        "tickets_sold": event.tickets_sold,
+        "tickets_left": _available(event),
+        "images": [_static_url(image.filename) for image in sorted(event.images, key=lambda image: image.id)],
+        "tickets": _ticket_tiers(event),
+        "updated_at": _isoformat_utc(event.updated_at or event.created_at),
+    })
+    return _conditional(payload, etag, last_modified)
+
+
+@api_bp.route("/events/<int:event_id>/tickets")
+def event_tickets(event_id):
+    """Ticket tiers with live availability; poll this with If-None-Match."""
+    etag, last_modified = event_state(event_id)
+    etag = "tickets-" + etag
+    if request.if_none_match.contains_weak(etag):  # compressed responses carry it weak
+        return _not_modified(etag, last_modified)
+
+    event = Event.query.options(selectinload(Event.tickets)).filter_by(id=event_id).first_or_404()
+    payload = {
+        "event_id": event.id,
+        "version": event.version,
+        "status": event.current_status.value,
+        "tickets_left": _available(event),
+        "tiers": _ticket_tiers(event),
+    }
+    return _conditional(payload, etag, last_modified)
+
+
+@api_bp.errorhandler(404)
+def not_found(error):
+    return jsonify(error="not found"), 404
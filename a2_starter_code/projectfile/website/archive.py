@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from sqlalchemy import delete, insert, literal, select
+
+from . import db
+from .models import ArchivedOrder, Event, Order
+
+
+# Orders for events that have happened never change again, so they move to
+# archived_orders. That keeps `orders`, which every booking writes to, sized
+# to upcoming events; history reads both tables through OrderHistory.
+
+ARCHIVE_BATCH_SIZE = 5000
+
+
+def archive_past_orders(today=None, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move orders for events dated before `today` to archived_orders.
+
+    Each batch is copied and deleted in its own short transaction, so the
+    writer lock is never held for long. Returns the number of orders moved.
+    """
+    today = today or datetime.now().date()
+    archived_at = datetime.utcnow()
+    moved = 0
+    while True:
+        ids = db.session.scalars(
+            select(Order.id)
+            .join(Event, Event.id == Order.event_id)
+            .where(Event.event_date < today)  # walks the event date index, then ix_orders_event_id
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            return moved
+        db.session.execute(insert(ArchivedOrder).from_select(
+            ["order_id", "price", "quantity", "order_date", "user_id", "event_id", "ticket_id", "archived_at"],
+            select(Order.id, Order.price, Order.quantity, Order.order_date,
+                   Order.user_id, Order.event_id, Order.ticket_id, literal(archived_at))
+            .where(Order.id.in_(ids)),
+        ))
+        db.session.execute(delete(Order).where(Order.id.in_(ids)).execution_options(synchronize_session=False))
+        db.session.commit()
+        moved += len(ids)
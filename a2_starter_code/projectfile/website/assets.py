@@ -0,0 +1,178 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import abort, current_app, request, send_from_directory
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always produced
+    brotli = None
+
+
+FINGERPRINT_LENGTH = 10
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Text assets worth shipping precompressed (images are already compressed)
+COMPRESSIBLE = {".css", ".js", ".svg", ".html", ".json", ".txt", ".xml", ".map"}
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_FINGERPRINTED = re.compile(
+    rf"^(?P<base>.+)\.(?P<digest>[0-9a-f]{{{FINGERPRINT_LENGTH}}})(?P<ext>\.[^./]+)$"
+)
+
+# path -> (mtime_ns, size, digest); recomputed only when the file changes
+_digests = {}
+# static filename -> digest from the build-time manifest; the only files url_for versions
+_manifest = {}
+
+
+def file_digest(path):
+    stat = os.stat(path)
+    cached = _digests.get(path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            sha.update(chunk)
+    digest = sha.hexdigest()[:FINGERPRINT_LENGTH]
+    _digests[path] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+
+def fingerprint(filename):
+    """'style/main.css' -> 'style/main.<digest>.css', or unchanged if it isn't in the manifest.
+
+    A dict lookup, no filesystem access: uploads added after the build stay
+    unversioned rather than being statted and hashed on every url_for.
+    """
+    digest = _manifest.get(filename)
+    if digest is None:
+        return filename
+    base, ext = os.path.splitext(filename)
+    return f"{base}.{digest}{ext}"
+
+
+def _fingerprint_static_urls(endpoint, values):
+    if endpoint == "static" and "filename" in values:
+        values["filename"] = fingerprint(values["filename"])
+
+
+def _precompressed(filename):
+    """Pick a .br/.gz sibling the client accepts, as (path, encoding)."""
+    if os.path.splitext(filename)[1].lower() not in COMPRESSIBLE:
+        return filename, None
+    accepted = request.accept_encodings
+    for encoding, suffix in ENCODINGS:
+        candidate = filename + suffix
+        if accepted[encoding] and os.path.isfile(os.path.join(current_app.static_folder, candidate)):
+            return candidate, encoding
+    return filename, None
+
+
+def static_view(filename):
+    """Serve /static, with long-lived caching for fingerprinted URLs."""
+    static_folder = current_app.static_folder
+    if safe_join(static_folder, filename) is None:
+        abort(404)
+    if os.path.isfile(os.path.join(static_folder, filename)):
+        return current_app.send_static_file(filename)
+
+    match = _FINGERPRINTED.match(filename)
+    if not match:
+        return current_app.send_static_file(filename)
+    original = match["base"] + match["ext"]
+    original_path = os.path.join(static_folder, original)
+    if not os.path.isfile(original_path):
+        return current_app.send_static_file(filename)  # 404
+
+    mimetype = mimetypes.guess_type(original)[0] or "application/octet-stream"
+    to_send, encoding = _precompressed(original)
+    response = send_from_directory(static_folder, to_send, mimetype=mimetype)
+
+    if match["digest"] == file_digest(original_path):
+        response.headers["Cache-Control"] = IMMUTABLE
+    else:
+        # Stale fingerprint from an old page: serve current content, but don't pin it
+        response.headers["Cache-Control"] = "no-cache"
+    if os.path.splitext(original)[1].lower() in COMPRESSIBLE:
+        response.vary.add("Accept-Encoding")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def precompress_static(static_folder, force=False):
+    """Write .gz (and .br when available) next to each text asset. Returns files written."""
+    written = 0
+    for root, _dirs, files in os.walk(static_folder):
+        for name in files:
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE:
+                continue
+            source = os.path.join(root, name)
+            with open(source, "rb") as f:
+                data = f.read()
+            outputs = [(".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                outputs.append((".br", lambda d: brotli.compress(d, quality=11)))
+            for suffix, compress in outputs:
+                target = source + suffix
+                if not force and os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source):
+                    continue
+                with open(target, "wb") as f:
+                    f.write(compress(data))
+                written += 1
+    return written
+
+
+def write_manifest(static_folder, manifest_path):
+    """Fingerprint every static file and save the digests for fast app start."""
+    entries = {}
+    for root, _dirs, files in os.walk(static_folder):
+        for name in files:
+            if name.endswith((".gz", ".br")):
+                continue
+            path = os.path.join(root, name)
+            digest = file_digest(path)
+            mtime_ns, size, _ = _digests[path]
+            entries[os.path.relpath(path, static_folder)] = [mtime_ns, size, digest]
+    with open(manifest_path, "w") as f:
+        json.dump(entries, f)
+    return len(entries)
+
+
+def load_manifest(static_folder, manifest_path):
+    """Seed the digest cache from a build-time manifest (entries are still mtime-checked)."""
+    try:
+        with open(manifest_path) as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    for relpath, (mtime_ns, size, digest) in entries.items():
+        _digests[os.path.join(static_folder, relpath)] = (mtime_ns, size, digest)
+        _manifest[relpath.replace(os.sep, "/")] = digest
+    return len(entries)
+
+
+def manifest_path(app):
+    return os.path.join(app.instance_path, "static-manifest.json")
+
+
+def init_assets(app):
+    """Fingerprint url_for('static') URLs and serve them precompressed and immutable.
+
+    Startup only reads the manifest `flask build-assets` wrote; nothing is
+    hashed or written here. Without a manifest, static URLs stay plain.
+    """
+    if not app.config["STATIC_FINGERPRINT"]:
+        return
+    app.view_functions["static"] = static_view
+    if not load_manifest(app.static_folder, manifest_path(app)):
+        app.logger.info("No static manifest; serving plain /static URLs until `flask build-assets` runs")
+        return
+    app.url_defaults(_fingerprint_static_urls)
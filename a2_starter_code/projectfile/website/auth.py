@@ -1,5 +1,4 @@
 from flask import Blueprint, flash, render_template, request, url_for, redirect
-from flask_bcrypt import generate_password_hash, check_password_hash
 from flask_login import login_user, logout_user, login_required, current_user
 from wtforms.fields import datetime
 
@@ -8,6 +7,16 @@ from .forms import LoginForm, RegisterForm
 from . import db
 from .forms import EventForm
 from .models import Event, Ticket
+from .passwords import HashQueueFull, check_password, hash_password
+
+# Seconds a client is asked to wait when the password hash queue is full
+BUSY_RETRY_AFTER = 5
+
+
+def _busy(template, form, heading):
+    flash("We're handling a lot of sign-ins right now. Please try again in a few seconds.", "warning")
+    response = render_template(template, form=form, heading=heading)
+    return response, 503, {"Retry-After": str(BUSY_RETRY_AFTER)}
 
 
 # Create a blueprint - make sure all BPs have unique names
@@ -26,12 +35,18 @@ def login():
 
         user = db.session.scalar(db.select(User).where(User.username == username))
 
+        try:
+            valid = bool(user) and check_password(user, password)
+        except HashQueueFull:
+            return _busy("login.html", form, "Login")
+
         if not user:
             flash("Incorrect username", "danger")
-        elif not check_password_hash(user.password_hash, password):
+        elif not valid:
             flash("Incorrect password", "danger")
         else:
             login_user(user)
+            db.session.commit()  # keeps a hash upgraded to the current cost
             next_page = request.args.get("next")
             if not next_page or not next_page.startswith("/"):
                 next_page = url_for("main.index")
@@ -67,7 +82,10 @@ def signup():
             return render_template("signup.html", form=form, heading="Sign Up")
 
         # Hash password
-        hashed_password = generate_password_hash(password).decode("utf-8")
+        try:
+            hashed_password = hash_password(password)
+        except HashQueueFull:
+            return _busy("signup.html", form, "Sign Up")
 
         # Create user
         new_user = User(
@@ -0,0 +1,169 @@
+import random
+import time
+from datetime import datetime
+
+from sqlalchemy import case, delete, literal, update
+from sqlalchemy.exc import OperationalError
+
+from . import db
+from .models import Event, EventStatus, Ticket, Order
+from .sales import record_sale
+
+
+# Retry policy for SQLite writer-lock conflicts
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 0.01  # seconds
+BACKOFF_CAP = 0.25
+
+
+class BookingRejected(Exception):
+    """The event (or order) cannot take the requested change."""
+
+
+def _is_lock_conflict(error):
+    message = str(error.orig).lower()
+    return "locked" in message or "busy" in message
+
+
+def _run_with_retry(work):
+    """Run work() and commit, retrying lock conflicts with bounded backoff."""
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            result = work()
+            db.session.commit()
+            return result
+        except BookingRejected:
+            db.session.rollback()
+            raise
+        except OperationalError as error:
+            db.session.rollback()
+            if not _is_lock_conflict(error) or attempt == MAX_ATTEMPTS - 1:
+                raise
+            delay = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)
+            time.sleep(delay * random.uniform(0.5, 1.0))
+
+
+def reserve_event_capacity(event_id, qty):
+    """Take qty seats from an open, upcoming event in a single UPDATE.
+
+    The capacity check, the increment and the SOLD_OUT flip all happen in the
+    same statement, so concurrent buyers can never oversell. Returns True if
+    the seats were reserved.
+    """
+    new_total = Event.tickets_sold + qty
+    sold_out = literal(EventStatus.SOLD_OUT, Event.status.type)
+    result = db.session.execute(
+        update(Event)
+        .where(
+            Event.id == event_id,
+            Event.status == EventStatus.OPEN,
+            Event.event_date >= datetime.now().date(),
+            (Event.attendees.is_(None)) | (new_total <= Event.attendees),
+        )
+        .values(
+            tickets_sold=new_total,
+            status=case(
+                ((Event.attendees.is_not(None)) & (new_total >= Event.attendees), sold_out),
+                else_=Event.status,
+            ),
+            **Event.bumped_version(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def release_event_capacity(event_id, ticket_id, qty):
+    """Give qty seats back to an event and tier, re-opening a sold out event."""
+    reopened = literal(EventStatus.OPEN, Event.status.type)
+    db.session.execute(
+        update(Event)
+        .where(Event.id == event_id)
+        .values(
+            tickets_sold=Event.tickets_sold - qty,
+            status=case((Event.status == EventStatus.SOLD_OUT, reopened), else_=Event.status),
+            **Event.bumped_version(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        update(Ticket)
+        .where(Ticket.id == ticket_id)
+        .values(tickets_sold=Ticket.tickets_sold - qty)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def book_event_tickets(event_id, user_id, quantities):
+    """Book {Ticket: qty} for a user in one short write transaction.
+
+    The conditional capacity UPDATE is the first statement, so the writer lock
+    is held only for the handful of statements that follow it. Raises
+    BookingRejected when the event is full, closed or in the past.
+    """
+    total = sum(quantities.values())
+
+    def work():
+        if not reserve_event_capacity(event_id, total):
+            raise BookingRejected(f"Event {event_id} cannot take {total} more tickets.")
+
+        for ticket, qty in quantities.items():
+            db.session.execute(
+                update(Ticket)
+                .where(Ticket.id == ticket.id)
+                .values(tickets_sold=Ticket.tickets_sold + qty)
+                .execution_options(synchronize_session=False)
+            )
+            record_sale(event_id, ticket.id, qty, ticket.price * qty)
+
+            # Top up the user's existing order for this ticket type, or create one
+            topped_up = db.session.execute(
+                update(Order)
+                .where(
+                    Order.user_id == user_id,
+                    Order.event_id == event_id,
+                    Order.ticket_id == ticket.id,
+                )
+                .values(quantity=Order.quantity + qty, price=Order.price + ticket.price * qty)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not topped_up:
+                db.session.add(Order(
+                    user_id=user_id,
+                    event_id=event_id,
+                    ticket_id=ticket.id,
+                    quantity=qty,
+                    price=ticket.price * qty,
+                    order_date=datetime.utcnow()
+                ))
+        return total
+
+    return _run_with_retry(work)
+
+
+def cancel_order_tickets(order, qty):
+    """Cancel qty tickets from an order, deleting it once nothing is left."""
+    order_id, event_id, ticket_id = order.id, order.event_id, order.ticket_id
+    unit_price = order.ticket.price
+
+    def work():
+        remaining = Order.quantity - qty
+        cancelled = db.session.execute(
+            update(Order)
+            .where(Order.id == order_id, Order.quantity >= qty)
+            .values(quantity=remaining, price=unit_price * remaining)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not cancelled:
+            raise BookingRejected(f"Order {order_id} does not hold {qty} tickets.")
+
+        db.session.execute(
+            delete(Order)
+            .where(Order.id == order_id, Order.quantity == 0)
+            .execution_options(synchronize_session=False)
+        )
+        release_event_capacity(event_id, ticket_id, qty)
+        record_sale(event_id, ticket_id, -qty, -unit_price * qty)
+        return qty
+
+    return _run_with_retry(work)
@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import Counter, OrderedDict, namedtuple
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import and_, case, func, literal, true
+
+from .models import Event, EventStatus, Genre
+from .search import match_expression, search_enabled, search_events
+
+
+# Price bands for the /events facet: (key for ?price=, label, low, high);
+# an event falls in a band by its cheapest tier, low <= min_price < high
+PRICE_BANDS = [
+    ("under-50", "Under $50", None, 50),
+    ("50-100", "$50 – $100", 50, 100),
+    ("100-200", "$100 – $200", 100, 200),
+    ("200-up", "$200+", 200, None),
+]
+
+FACET_CACHE_SIZE = 64  # cached whole-catalogue cubes, one per max_price value
+
+# (today, max_price) -> (built_at, cube rows); process-local, refreshed by age only
+_cubes = OrderedDict()
+_cubes_lock = threading.Lock()
+
+GENRE_ALIASES = {
+    "70s": "SEVENTIES",
+    "80s": "EIGHTIES",
+    "90s": "NINETIES",
+    "00s": "TWO_THOUSANDS"
+}
+
+
+def _price_band(low, high):
+    conditions = []
+    if low is not None:
+        conditions.append(Event.min_price >= low)
+    if high is not None:
+        conditions.append(Event.min_price < high)
+    return and_(Event.min_price.is_not(None), *conditions)
+
+
+def _searched(args):
+    """Event.query narrowed by the search and location boxes, plus its search sort columns (or None)."""
+    query = Event.query
+    search_query = args.get('q', '').strip()
+    location = args.get('location', '').strip()
+
+    # Title/description/venue search goes through the FTS5 index when available
+    match = match_expression(search_query, location) if search_enabled() else ""
+    if match:
+        return search_events(query, match, ranked=args.get('sort') == 'relevance')
+    if search_query:
+        query = query.filter(Event.title.ilike(f"%{search_query}%"))
+    if location:
+        query = query.filter(Event.venue.ilike(f"%{location}%"))
+    return query, None
+
+
+Facets = namedtuple("Facets", "genres status max_price band")
+
+
+def _requested_facets(args):
+    """The genre, status and price filters in args; None where a filter isn't set."""
+    genres = None
+    if args.getlist('genre'):
+        # Genres filter fixer
+        genres = []
+        for g in args.getlist('genre'):
+            key = GENRE_ALIASES.get(g.lower(), g.upper())
+            if key in Genre.__members__:
+                genres.append(Genre[key])
+
+    status = None
+    if args.get('status'):
+        status_key = args.get('status').replace(" ", "_").upper()
+        status = EventStatus.__members__.get(status_key)
+
+    keys = [band[0] for band in PRICE_BANDS]
+    band = keys.index(args.get('price')) if args.get('price') in keys else None
+    return Facets(genres, status, args.get('max_price', type=float), band)
+
+
+def _facet_filters(facets, today):
+    """{facet: SQL condition or None} for the requested genre, status and price filters."""
+    filters = {"genre": None, "status": None, "price": None}
+    if facets.genres is not None:
+        filters["genre"] = Event.genre.in_(facets.genres)
+    if facets.status is not None:
+        filters["status"] = Event.has_current_status(facets.status, today)
+
+    # Events without tiers have no price and pass the slider, as before
+    price = []
+    if facets.max_price is not None:
+        price.append(Event.min_price.is_(None) | (Event.min_price <= facets.max_price))
+    if facets.band is not None:
+        price.append(_price_band(*PRICE_BANDS[facets.band][2:]))
+    if price:
+        filters["price"] = and_(*price)
+    return filters
+
+
+def filtered_events(args):
+    """The /events catalogue query for a set of request args.
+
+    Returns (query, sort_columns) ready for keyset_page: soonest first, or
+    best search matches first when a search asks for sort=relevance. Every
+    filter is a condition on events itself, so there is one row per event.
+    """
+    query, sort_columns = _searched(args)
+    filters = _facet_filters(_requested_facets(args), datetime.now().date())
+    conditions = [condition for condition in filters.values() if condition is not None]
+    if conditions:
+        query = query.filter(*conditions)
+    return query, sort_columns or [Event.event_date, Event.id]
+
+
+def _facet_cube(query, today, max_price):
+    """Event counts grouped by (genre, current status, price band, within max_price).
+
+    A few hundred rows at most, whatever the size of the catalogue; every
+    facet count is a sum over it.
+    """
+    current_status = case(
+        (Event.event_date < today, literal(EventStatus.INACTIVE, Event.status.type)),
+        else_=Event.status,
+    )
+    band = case(*[(_price_band(low, high), index) for index, (_, _, low, high) in enumerate(PRICE_BANDS)])
+    within = true() if max_price is None else Event.min_price.is_(None) | (Event.min_price <= max_price)
+    return query.with_entities(Event.genre, current_status, band, within, func.count()).group_by(
+        Event.genre, current_status, band, within
+    ).order_by(None).all()
+
+
+def _cached_cube(today, max_price):
+    """The whole-catalogue cube, reused for FACET_CACHE_SECONDS (per max_price)."""
+    key = (today, max_price)
+    with _cubes_lock:
+        entry = _cubes.get(key)
+        if entry and time.monotonic() - entry[0] < current_app.config["FACET_CACHE_SECONDS"]:
+            _cubes.move_to_end(key)
+            return entry[1]
+    cube = _facet_cube(Event.query, today, max_price)
+    with _cubes_lock:
+        _cubes[key] = (time.monotonic(), cube)
+        _cubes.move_to_end(key)
+        while len(_cubes) > FACET_CACHE_SIZE:
+            _cubes.popitem(last=False)
+    return cube
+
+
+def facet_counts(args):
+    """Result counts per genre, status and price band, from one aggregate query.
+
+    Each facet's counts apply the other facets' filters but not its own, so
+    ticking another genre shows how many events it would add. Without a
+    search term the counts cover the whole catalogue and may be up to
+    FACET_CACHE_SECONDS old. Returns {"genre": [(value, count)],
+    "status": [(value, count)], "price": [(key, label, count)]}.
+    """
+    facets = _requested_facets(args)
+    today = datetime.now().date()
+    searching = args.get('q', '').strip() or args.get('location', '').strip()
+    if searching:
+        cube = _facet_cube(_searched(args)[0], today, facets.max_price)
+    else:
+        cube = _cached_cube(today, facets.max_price)
+
+    counts = {"genre": Counter(), "status": Counter(), "price": Counter()}
+    for genre, status, band, within, count in cube:
+        genre_ok = facets.genres is None or genre in facets.genres
+        status_ok = facets.status is None or status == facets.status
+        price_ok = bool(within) and facets.band in (None, band)
+        counts["genre"][genre] += count * (status_ok and price_ok)
+        counts["status"][status] += count * (genre_ok and price_ok)
+        counts["price"][band] += count * (genre_ok and status_ok)
+
+    return {
+        "genre": [(genre.value, counts["genre"][genre]) for genre in Genre],
+        "status": [(status.value, counts["status"][status]) for status in EventStatus],
+        "price": [(key, label, counts["price"][index]) for index, (key, label, _, _) in enumerate(PRICE_BANDS)],
+    }
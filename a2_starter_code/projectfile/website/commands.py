@@ -0,0 +1,208 @@
+import json
+import os
+import time
+
+import click
+
+from . import db
+
+
+@click.command("reconcile-counters")
+def reconcile_counters_command():
+    """Rebuild the tickets_sold, comment_count and min_price columns."""
+    from .counters import reconcile_counters
+
+    events_updated, tickets_updated, comments_updated, prices_updated = reconcile_counters()
+    db.session.commit()
+    click.echo(f"Corrected tickets_sold on {events_updated} events and {tickets_updated} ticket tiers, "
+               f"comment_count on {comments_updated} events and min_price on {prices_updated} events.")
+
+
+@click.command("rebuild-sales")
+@click.option("--event", "event_id", type=int, help="Only this event (default: all).")
+def rebuild_sales_command(event_id):
+    """Rebuild the daily sales rollup behind the organiser dashboard from orders."""
+    from .sales import rebuild_sales_rollup
+
+    rows = rebuild_sales_rollup(event_id)
+    db.session.commit()
+    click.echo(f"Rebuilt {rows} daily sales rows.")
+
+
+@click.command("sweep-statuses")
+@click.option("--every", type=int, default=0,
+              help="Keep running and sweep every N seconds (cron-like loop).")
+def sweep_statuses_command(every):
+    """Mark past events INACTIVE in one bulk UPDATE."""
+    from .sweeper import sweep_past_events
+
+    while True:
+        swept = sweep_past_events()
+        click.echo(f"Marked {swept} past events INACTIVE.")
+        if not every:
+            break
+        time.sleep(every)
+
+
+@click.command("archive-orders")
+@click.option("--batch-size", type=int, default=None, help="Orders moved per transaction.")
+def archive_orders_command(batch_size):
+    """Move orders for past events from orders to archived_orders."""
+    from .archive import ARCHIVE_BATCH_SIZE, archive_past_orders
+
+    moved = archive_past_orders(batch_size=batch_size or ARCHIVE_BATCH_SIZE)
+    click.echo(f"Archived {moved} orders.")
+
+
+@click.command("process-images")
+def process_images_command():
+    """Build resized variants for every event image that lacks them."""
+    from flask import current_app
+    from .images import CAROUSEL_ROLES, EVENT_PHOTO_ROLES, Image, make_variants
+    from .models import Event, EventImage
+
+    if Image is None:
+        raise click.ClickException("Pillow is not installed.")
+
+    upload_folder = current_app.config["UPLOAD_FOLDER"]
+    done = failed = 0
+    jobs = [(event, event.photo, "photo_variant", EVENT_PHOTO_ROLES)
+            for event in Event.query.filter(Event.photo.is_not(None), Event.photo_variant.is_(None))]
+    jobs += [(img, img.filename, "variant", CAROUSEL_ROLES)
+             for img in EventImage.query.filter(EventImage.variant.is_(None))]
+    for record, filename, attribute, roles in jobs:
+        try:
+            setattr(record, attribute, make_variants(upload_folder, filename, roles))
+            done += 1
+        except (OSError, ValueError) as error:
+            failed += 1
+            click.echo(f"Skipped {filename}: {error}", err=True)
+    db.session.commit()
+    click.echo(f"Built variants for {done} images ({failed} skipped).")
+
+
+@click.command("build-assets")
+@click.option("--force", is_flag=True, help="Recompress even if outputs are up to date.")
+def build_assets_command(force):
+    """Precompress text assets under /static and write the fingerprint manifest."""
+    from flask import current_app
+    from .assets import manifest_path, precompress_static, write_manifest
+
+    written = precompress_static(current_app.static_folder, force=force)
+    hashed = write_manifest(current_app.static_folder, manifest_path(current_app))
+    click.echo(f"Wrote {written} precompressed files; fingerprinted {hashed} assets.")
+
+
+@click.command("import-events")
+@click.argument("source", type=click.File("r", encoding="utf-8"))
+@click.option("--owner", required=True, help="Username that will own the imported events.")
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]),
+              help="Input format (default: from the file extension).")
+@click.option("--batch-size", type=int, default=None, help="Events per transaction.")
+@click.option("--errors", "error_file", type=click.File("w", encoding="utf-8"),
+              help="Write every rejected row here (the console shows the first few).")
+def import_events_command(source, owner, fmt, batch_size, error_file):
+    """Bulk-import a CSV or JSONL catalogue of events, tickets and images."""
+    from .importer import BATCH_SIZE, import_events, read_rows
+    from .models import User
+
+    fmt = fmt or ("jsonl" if source.name.endswith((".jsonl", ".ndjson")) else "csv")
+    owner_id = db.session.scalar(db.select(User.id).where(User.username == owner))
+    if owner_id is None:
+        raise click.ClickException(f"No user named {owner!r}.")
+
+    shown = 0
+
+    def on_error(line_number, message):
+        nonlocal shown
+        if error_file:
+            error_file.write(json.dumps({"line": line_number, "error": message}) + "\n")
+        if shown < 20:
+            click.echo(f"line {line_number}: {message}", err=True)
+            shown += 1
+
+    def on_progress(totals, elapsed):
+        click.echo(f"  {totals['events']} events ({totals['events'] / elapsed:,.0f}/s), "
+                   f"{totals['errors']} rejected")
+
+    totals = import_events(read_rows(source, fmt), owner_id, batch_size=batch_size or BATCH_SIZE,
+                           on_error=on_error, on_progress=on_progress)
+    click.echo(f"Imported {totals['events']} events, {totals['tickets']} ticket tiers and "
+               f"{totals['images']} images in {totals['seconds']:.1f}s; {totals['errors']} rows rejected.")
+    if totals["images"]:
+        click.echo("Run `flask process-images` to build resized variants for the new images.")
+
+
+@click.command("seed-data")
+@click.option("--users", type=int, default=100_000, show_default=True)
+@click.option("--events", type=int, default=200_000, show_default=True)
+@click.option("--orders", type=int, default=5_000_000, show_default=True)
+@click.option("--comments", type=int, default=1_000_000, show_default=True)
+@click.option("--seed", type=int, default=207, show_default=True, help="Same seed, same data.")
+@click.option("--anchor", type=click.DateTime(["%Y-%m-%d"]),
+              help="Date the events spread around (default: today).")
+def seed_data_command(users, events, orders, comments, seed, anchor):
+    """Fill an empty database with synthetic data for load testing."""
+    from .seeding import SEED_PASSWORD, SeedingError, seed_database
+
+    def on_progress(label, count, elapsed):
+        click.echo(f"  {count:,} {label} ({elapsed:.1f}s)")
+
+    try:
+        totals = seed_database(users, events, orders, comments, seed=seed,
+                               anchor=anchor.date() if anchor else None, on_progress=on_progress)
+    except SeedingError as error:
+        raise click.ClickException(str(error))
+    click.echo(f"Seeded {totals['users']:,} users, {totals['events']:,} events ({totals['tickets']:,} tiers), "
+               f"{totals['orders']:,} orders and {totals['comments']:,} comments in {totals['seconds']:.1f}s.")
+    click.echo(f"Users are user1..user{users} with password {SEED_PASSWORD!r}.")
+
+
+@click.command("compile-templates")
+def compile_templates_command():
+    """Precompile templates into the on-disk Jinja bytecode cache."""
+    from flask import current_app
+    from jinja2 import FileSystemBytecodeCache
+    from .templating import bytecode_cache_dir, precompile_templates
+
+    directory = bytecode_cache_dir(current_app)
+    os.makedirs(directory, exist_ok=True)
+    current_app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+    count = precompile_templates(current_app)
+    click.echo(f"Compiled {count} templates into {directory}.")
+
+
+@click.command("db-upgrade")
+def db_upgrade_command():
+    """Create missing tables and apply pending schema migrations."""
+    from .migrations import create_schema
+
+    applied = create_schema()
+    for version, description in applied:
+        click.echo(f"Applied {version}: {description}")
+    if not applied:
+        click.echo("Database is up to date.")
+
+
+@click.command("db-status")
+def db_status_command():
+    """Show the schema version and any pending migrations."""
+    from .migrations import current_version, pending_migrations
+
+    click.echo(f"Schema version {current_version()}")
+    for version, description, _ in pending_migrations():
+        click.echo(f"  pending {version}: {description}")
+
+
+def register_commands(app):
+    app.cli.add_command(reconcile_counters_command)
+    app.cli.add_command(rebuild_sales_command)
+    app.cli.add_command(sweep_statuses_command)
+    app.cli.add_command(archive_orders_command)
+    app.cli.add_command(process_images_command)
+    app.cli.add_command(build_assets_command)
+    app.cli.add_command(compile_templates_command)
+    app.cli.add_command(import_events_command)
+    app.cli.add_command(seed_data_command)
+    app.cli.add_command(db_upgrade_command)
+    app.cli.add_command(db_status_command)
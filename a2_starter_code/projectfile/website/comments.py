@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from sqlalchemy import update
+from sqlalchemy.orm import joinedload
+
+from . import db
+from .models import Comment, Event
+from .pagination import keyset_page
+
+
+COMMENTS_PER_PAGE = 20
+
+
+def comments_page(event_id, cursor=None, per_page=COMMENTS_PER_PAGE):
+    """One page of an event's comments with their authors, newest first.
+
+    Keyset on (created_at, id), which ix_comments_event_created serves
+    directly, so deep pages cost the same as the first.
+    """
+    query = Comment.query.options(joinedload(Comment.user)).filter(Comment.event_id == event_id)
+    return keyset_page(query, [Comment.created_at, Comment.id], cursor=cursor,
+                       per_page=per_page, descending=True)
+
+
+def add_event_comment(event_id, user_id, content):
+    """Add a comment and bump the event's comment_count (and version) with it.
+
+    Returns False, saving nothing, if the event doesn't exist.
+    """
+    counted = db.session.execute(
+        update(Event).where(Event.id == event_id)
+        .values(comment_count=Event.comment_count + 1, **Event.bumped_version())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not counted:
+        db.session.rollback()
+        return False
+    db.session.add(Comment(content=content, user_id=user_id, event_id=event_id,
+                           created_at=datetime.utcnow()))
+    db.session.commit()
+    return True
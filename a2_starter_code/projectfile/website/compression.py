@@ -0,0 +1,140 @@
+import gzip
+import zlib
+
+from flask import Response, current_app, get_flashed_messages, render_template, request, stream_template
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+# Dynamic responses (pages, JSON) are compressed on the way out, negotiated
+# via Accept-Encoding. Static files are not touched here: assets.py serves
+# their precompressed .br/.gz siblings.
+
+COMPRESSIBLE_TYPES = {
+    "text/html", "text/plain", "text/css", "text/xml", "text/javascript",
+    "application/json", "application/javascript", "image/svg+xml",
+}
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # fast enough per request; static assets get 11
+
+STREAM_CHUNK_SIZE = 8192  # bytes of rendered HTML per network write
+
+
+def _negotiate():
+    """The best encoding both sides support, or None."""
+    accepted = request.accept_encodings
+    choices = [("br", accepted["br"])] if brotli is not None else []
+    choices.append(("gzip", accepted["gzip"]))
+    encoding, quality = max(choices, key=lambda choice: choice[1])
+    return encoding if quality > 0 else None
+
+
+def _compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def _closing(chunks):
+    """Close the wrapped iterable too when the server closes ours (e.g. the client left).
+
+    The innermost one is Flask's stream_with_context, which holds the request
+    context open until it is closed.
+    """
+    close = getattr(chunks, "close", None)
+    if close is not None:
+        close()
+
+
+def _compress_stream(chunks, encoding):
+    """Compress an iterable of byte chunks, flushing after each one."""
+    try:
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            for chunk in chunks:
+                data = compressor.process(chunk) + compressor.flush()
+                if data:
+                    yield data
+            yield compressor.finish()
+        else:
+            compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            for chunk in chunks:
+                data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                if data:
+                    yield data
+            yield compressor.flush()
+    finally:
+        _closing(chunks)
+
+
+def _coalesce(chunks, size=STREAM_CHUNK_SIZE):
+    """Regroup Jinja's many small string fragments into ~size-byte writes."""
+    buffer, buffered = [], 0
+    try:
+        for chunk in chunks:
+            data = chunk.encode() if isinstance(chunk, str) else chunk
+            buffer.append(data)
+            buffered += len(data)
+            if buffered >= size:
+                yield b"".join(buffer)
+                buffer, buffered = [], 0
+        if buffer:
+            yield b"".join(buffer)
+    finally:
+        _closing(chunks)
+
+
+def render_page(template_name, **context):
+    """Render a large listing page, streamed when STREAM_PAGES is on.
+
+    Streaming sends the page head while the rest renders. Anything the
+    template needs from the database should be loaded before this is
+    called, and the template must not write to the session.
+    """
+    if not current_app.config["STREAM_PAGES"]:
+        return render_template(template_name, **context)
+    # The session cookie goes out before the body streams, so pop the flashes
+    # now; the template's get_flashed_messages() reuses this request's copy
+    get_flashed_messages()
+    return Response(_coalesce(stream_template(template_name, **context)), mimetype="text/html")
+
+
+def compress_response(response):
+    """after_request hook: gzip/br compressible responses the client accepts."""
+    if (
+        response.mimetype not in COMPRESSIBLE_TYPES
+        or not 200 <= response.status_code < 300
+        or response.status_code in (204, 206)
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or "no-transform" in response.headers.get("Cache-Control", "")
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+
+    encoding = _negotiate()
+    if encoding is None:
+        return response
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < current_app.config["COMPRESS_MIN_SIZE"]:
+            return response
+        response.set_data(_compress(data, encoding))
+
+    response.headers["Content-Encoding"] = encoding
+    # The compressed bytes differ from the identity ones, so a strong tag becomes weak
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    if app.config["COMPRESS_RESPONSES"]:
+        app.after_request(compress_response)
@@ -0,0 +1,42 @@
+from sqlalchemy import func, select, update
+
+from . import db
+from .models import ArchivedOrder, Comment, Event, Ticket, Order
+from .pricing import min_price_of
+
+
+def _quantity_sum(model, condition):
+    """Scalar subquery: tickets in the `model` rows (Order or ArchivedOrder) matching condition."""
+    return select(func.coalesce(func.sum(model.quantity), 0)).where(condition).scalar_subquery()
+
+
+def reconcile_counters():
+    """Rebuild the tickets_sold, comment_count and min_price columns from their tables.
+
+    Only rows whose value was wrong are written (and get a new version).
+    Returns how many event sales, ticket tiers, event comment counts and
+    event minimum prices were corrected.
+    """
+    # Sales count live and archived orders alike
+    event_total = (_quantity_sum(Order, Order.event_id == Event.id)
+                   + _quantity_sum(ArchivedOrder, ArchivedOrder.event_id == Event.id))
+    ticket_total = (_quantity_sum(Order, Order.ticket_id == Ticket.id)
+                    + _quantity_sum(ArchivedOrder, ArchivedOrder.ticket_id == Ticket.id))
+    events_updated = db.session.execute(
+        update(Event).where(Event.tickets_sold != event_total)
+        .values(tickets_sold=event_total, **Event.bumped_version())
+    ).rowcount
+    tickets_updated = db.session.execute(
+        update(Ticket).where(Ticket.tickets_sold != ticket_total).values(tickets_sold=ticket_total)
+    ).rowcount
+    comment_total = select(func.count()).where(Comment.event_id == Event.id).scalar_subquery()
+    comments_updated = db.session.execute(
+        update(Event).where(Event.comment_count != comment_total)
+        .values(comment_count=comment_total, **Event.bumped_version())
+    ).rowcount
+    cheapest = min_price_of(Event.id)
+    prices_updated = db.session.execute(
+        update(Event).where(Event.min_price.is_not(cheapest))
+        .values(min_price=cheapest, **Event.bumped_version())
+    ).rowcount
+    return events_updated, tickets_updated, comments_updated, prices_updated
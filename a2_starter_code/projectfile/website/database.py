@@ -0,0 +1,103 @@
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+READER = "reader"  # bind key of the read-only connection pool
+READ_METHODS = ("GET", "HEAD")
+
+# SQLite connection profiles, picked with the DB_PROFILE setting
+# (e.g. FLASK_DB_PROFILE=production in the environment).
+PROFILES = {
+    "development": {
+        "pragmas": {},
+        "read_split": False,
+    },
+    "production": {
+        # WAL lets readers run alongside the writer instead of queueing behind it
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,  # ms to wait for the writer lock before "database is locked"
+            "mmap_size": 256 * 1024 * 1024,
+            "cache_size": -64 * 1024,  # negative = KiB, i.e. 64 MiB per connection
+            "temp_store": "MEMORY",
+        },
+        "read_split": True,
+        "writer_pool_size": 1,  # one writer connection: writes queue in the pool, not on the lock
+        "writer_pool_timeout": 30,
+        "reader_pool_size": 8,
+    },
+}
+
+# journal_mode is a property of the database file, so only the writer sets it
+WRITER_ONLY_PRAGMAS = ("journal_mode",)
+
+
+class RoutingSession(Session):
+    """Send GET/HEAD request queries to the read-only pool, everything else to the writer.
+
+    Flushes always go to the writer, and so does any work outside a request
+    (CLI commands, migrations, background threads).
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and READER in self._db.engines and self._reads_only():
+            return self._db.engines[READER]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _reads_only(self):
+        return has_request_context() and request.method in READ_METHODS and not self._flushing
+
+
+def _is_file_sqlite(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def configure_database(app):
+    """Fill in engine options and the reader bind for the configured DB_PROFILE.
+
+    Call before db.init_app(app).
+    """
+    profile = PROFILES[app.config["DB_PROFILE"]]
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    if not _is_file_sqlite(uri) or not profile["read_split"]:
+        return
+
+    engine_options = app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {})
+    engine_options.setdefault("pool_size", profile["writer_pool_size"])
+    engine_options.setdefault("max_overflow", 0)
+    engine_options.setdefault("pool_timeout", profile["writer_pool_timeout"])
+
+    binds = app.config.setdefault("SQLALCHEMY_BINDS", {})
+    binds.setdefault(READER, {
+        "url": app.config.get("DB_READ_URI") or uri,
+        "pool_size": profile["reader_pool_size"],
+        "max_overflow": profile["reader_pool_size"],
+    })
+
+
+def _pragma_listener(pragmas, read_only):
+    def apply(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            if read_only and name in WRITER_ONLY_PRAGMAS:
+                continue
+            cursor.execute(f"PRAGMA {name} = {value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only = ON")
+        cursor.close()
+    return apply
+
+
+def init_database(app, db):
+    """Apply the profile's PRAGMAs to every new SQLite connection. Needs an app context."""
+    pragmas = PROFILES[app.config["DB_PROFILE"]]["pragmas"]
+    for key, engine in db.engines.items():
+        if engine.dialect.name != "sqlite":
+            continue
+        read_only = key == READER
+        if pragmas or read_only:
+            event.listen(engine, "connect", _pragma_listener(pragmas, read_only))
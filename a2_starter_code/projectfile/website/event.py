@@ -1,13 +1,20 @@
 import os
 
-from flask import Blueprint, flash, render_template, request, url_for, redirect, current_app
+from flask import Blueprint, abort, flash, jsonify, render_template, request, url_for, redirect, current_app
 from flask_login import login_required, current_user
 from datetime import datetime
 from werkzeug.utils import secure_filename
 
-from .models import EventStatus, User, OrganisationType, Genre, Event, Ticket, EventImage, Comment, Order
+from .models import EventStatus, User, OrganisationType, Genre, Event, Ticket, EventImage, Comment, Order, OrderHistory, EVENT_PAGE_LOADS
 from . import db
+from .images import queue_event_images
+from .booking import BookingRejected, book_event_tickets, cancel_order_tickets
+from .comments import add_event_comment, comments_page
+from .compression import render_page
+from .pagination import keyset_page, page_url
+from .waiting_room import admission_token, is_admitted, token_state
 from sqlalchemy import cast, Date
+from sqlalchemy.orm import contains_eager, joinedload
 
 event_bp = Blueprint("event", __name__)
 
@@ -79,6 +86,8 @@ def create_event():
                     db.session.add(ticket)
 
             db.session.commit()
+            # Raw files are saved; resizing happens off the request
+            queue_event_images(current_app._get_current_object(), event)
             flash("Concert created successfully!", "success")
             return redirect(url_for("main.index"))
 
@@ -98,32 +107,48 @@ def add_comment(event_id):
         flash("Comment cannot be empty.", "danger")
         return redirect(url_for("main.details", event_id=event_id))
 
-    # Ensure event exists
-    event = Event.query.get_or_404(event_id)
-
-    # Create comment
-    comment = Comment(
-        content=content.strip(),
-        user_id=current_user.id,
-        event_id=event.id
-    )
-    db.session.add(comment)
-    db.session.commit()
+    # Counts the comment in the same transaction; False if the event doesn't exist
+    if not add_event_comment(event_id, current_user.id, content.strip()):
+        abort(404)
 
     flash("Comment added successfully!", "success")
-    return redirect(url_for("main.details", event_id=event.id))
+    return redirect(url_for("main.details", event_id=event_id))
+
+
+# One page of an event's comments as an HTML fragment, fetched by the details page
+@event_bp.route("/event/<int:event_id>/comments")
+def comments(event_id):
+    page = comments_page(event_id, cursor=request.args.get("cursor"))
+    next_url = url_for("event.comments", event_id=event_id, cursor=page.next_cursor) if page.next_cursor else None
+    return render_template("_comments.html", comments=page.items, next_url=next_url)
 
 
 # Route for Event Details
 @event_bp.route("/event/<int:event_id>", endpoint="event_details")
 @login_required
 def event_details(event_id):
-    event = Event.query.get_or_404(event_id)
+    event = Event.query.options(*EVENT_PAGE_LOADS).filter_by(id=event_id).first_or_404()
+
+    # On-sale queue: buyers wait here until their admission slot comes up
+    if event.admission_rate:
+        token = admission_token(event.id, current_user.id, event.admission_rate)
+        state, seconds, ahead = token_state(token, event.id, current_user.id)
+        if state == "waiting":
+            return render_template("waiting_room.html", event=event, token=token, wait_seconds=seconds,
+                                   ahead=ahead, poll_seconds=current_app.config["WAITING_ROOM_POLL_SECONDS"])
+
     tickets = event.tickets
     user_orders = Order.query.filter_by(user_id=current_user.id, event_id=event.id).all()
     return render_template("details.html", event=event, tickets=tickets, user_orders=user_orders, datetime=datetime)
 
 
+# Polled by the waiting room page; checks the signed token only, no database or login
+@event_bp.route("/waiting-room/<int:event_id>/status")
+def waiting_room_status(event_id):
+    state, seconds, ahead = token_state(request.args.get("token", ""), event_id)
+    return jsonify(state=state, wait_seconds=round(seconds) if state == "waiting" else 0, ahead=ahead)
+
+
 # Route for Book Tickets
 @event_bp.route("/book_tickets/<int:event_id>", methods=["POST"])
 @login_required
@@ -136,52 +161,33 @@ def book_tickets(event_id):
         flash("This event is not available for booking.", "warning")
         return redirect(url_for("event.event_details", event_id=event.id))
 
-    total_booked = sum(order.quantity for order in event.orders)
-    total_tickets_added = 0
+    # During an on-sale queue only buyers holding a live admission may book
+    if event.admission_rate and not is_admitted(event.id, current_user.id):
+        flash("Your turn to book hasn't come up yet, or your booking window has closed.", "warning")
+        return redirect(url_for("event.event_details", event_id=event.id))
 
+    # Collect the requested quantity for each ticket type
+    quantities = {}
     for ticket in tickets:
         qty = int(request.form.get(f"ticket_{ticket.id}", 0))
         if qty > 0:
-            # Prevent overbooking
-            if event.attendees and (total_booked + qty) > event.attendees:
-                flash(f"Cannot book {qty} tickets. Only {event.attendees - total_booked} left.", "warning")
-                return redirect(url_for("event.event_details", event_id=event.id))
+            quantities[ticket] = qty
 
-            # Check if user already booked this ticket type
-            existing_order = Order.query.filter_by(
-                user_id=current_user.id,
-                event_id=event.id,
-                ticket_id=ticket.id
-            ).first()
-
-            if existing_order:
-                existing_order.quantity += qty
-                existing_order.price += ticket.price * qty
-            else:
-                new_order = Order(
-                    user_id=current_user.id,
-                    event_id=event.id,
-                    ticket_id=ticket.id,
-                    quantity=qty,
-                    price=ticket.price * qty,
-                    order_date=datetime.utcnow()
-                )
-                db.session.add(new_order)
-
-            total_tickets_added += qty
-            total_booked += qty
-
-    if total_tickets_added == 0:
+    if not quantities:
         flash("Please select at least one ticket to book.", "warning")
         return redirect(url_for("event.event_details", event_id=event.id))
 
+    # Capacity is checked and taken atomically, so concurrent buyers cannot oversell
     try:
-        # Automatically mark SOLD_OUT if capacity reached
-        if event.attendees and total_booked >= event.attendees:
-            event.status = EventStatus.SOLD_OUT
-
-        db.session.commit()
+        book_event_tickets(event.id, current_user.id, quantities)
         flash("Tickets booked successfully!", "success")
+    except BookingRejected:
+        db.session.refresh(event)
+        if event.status == EventStatus.OPEN and event.tickets_left is not None:
+            total_requested = sum(quantities.values())
+            flash(f"Cannot book {total_requested} tickets. Only {event.tickets_left} left.", "warning")
+        else:
+            flash("This event is not available for booking.", "warning")
     except Exception:
         db.session.rollback()
         flash("Failed to book tickets. Please try again.", "danger")
@@ -215,52 +221,67 @@ def cancel_order(order_id):
 
     event_title = order.event.title
     ticket_type = order.ticket.ticket_type
+    fully_cancelled = cancel_qty == order.quantity
 
-    if cancel_qty == order.quantity:
-        # Cancel entire order
-        db.session.delete(order)
+    try:
+        cancel_order_tickets(order, cancel_qty)
+    except BookingRejected:
+        flash("This order has already been changed. Please try again.", "warning")
+        return redirect(url_for("event.upcoming"))
+
+    if fully_cancelled:
         flash(f"Your booking for {event_title} ({ticket_type}) has been fully cancelled.", "success")
     else:
-        # Partial cancellation
-        order.quantity -= cancel_qty
-        order.price = order.ticket.price * order.quantity  # update price
         flash(f"You have cancelled {cancel_qty} ticket(s) for {event_title} ({ticket_type}).", "success")
 
-    db.session.commit()
     return redirect(url_for("event.upcoming"))
 
 
 
+def _user_orders_with_events(*date_filters):
+    """The current user's orders with their event and ticket, filtered by event date in SQL."""
+    return (
+        Order.query.join(Order.event)
+        .options(contains_eager(Order.event), joinedload(Order.ticket))
+        .filter(Order.user_id == current_user.id, *date_filters)
+        .order_by(Event.event_date, Event.id, Order.id)
+        .all()
+    )
+
+
+def _events_of(orders):
+    """Distinct events of a list of orders, keeping their order."""
+    return list({order.event_id: order.event for order in orders}.values())
+
+
 # Upcoming Events Route
 @event_bp.route("/upcoming-event", endpoint="upcoming")
 @login_required
 def upcoming_view():
     """Shows only the user's future event bookings."""
-    user_orders = Order.query.filter_by(user_id=current_user.id).all()
-    event_ids = {order.event_id for order in user_orders}
-
     # Only events whose date is in the future or today
-    events = Event.query.filter(
-        Event.id.in_(event_ids),
-        Event.event_date >= datetime.now().date()
-    ).order_by(Event.event_date.asc()).all()
+    user_orders = _user_orders_with_events(Event.event_date >= datetime.now().date())
+    events = _events_of(user_orders)
 
     return render_template("UpcomingEvent.html", events=events, user_orders=user_orders)
 
 
 # Route for Past Bookings
-@login_required
 @event_bp.route("/event/history")
+@login_required
 def history_view():
-    # Get all orders for current user
-    user_orders = Order.query.filter_by(user_id=current_user.id).all()
-
-    # Get unique event IDs for events that are in the past
-    past_event_ids = {order.event_id for order in user_orders if order.event.event_date < datetime.now().date()}
-
-    # Query those events
-    events = Event.query.filter(Event.id.in_(past_event_ids)).order_by(Event.event_date.desc()).all()
-
-    return render_template("history.html", events=events, active_tab="past")
-
-    # test
+    # Past-event orders are mostly archived; OrderHistory reads live and archived alike.
+    # One page of them, newest event first, with event and ticket in the same query
+    query = (
+        OrderHistory.query.join(OrderHistory.event)
+        .options(contains_eager(OrderHistory.event), joinedload(OrderHistory.ticket))
+        .filter(OrderHistory.user_id == current_user.id, Event.event_date < datetime.now().date())
+    )
+    page = keyset_page(query, [Event.event_date, Event.id, OrderHistory.archived, OrderHistory.id],
+                       cursor=request.args.get("cursor"), descending=True)
+    user_orders = page.items
+    events = _events_of(user_orders)
+
+    return render_page("history.html", events=events, user_orders=user_orders, active_tab="past",
+                       next_url=page_url("event.history_view", page.next_cursor),
+                       prev_url=page_url("event.history_view", page.prev_cursor))
@@ -0,0 +1,188 @@
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from itertools import chain
+
+from flask import current_app
+from sqlalchemy import event as sa_event, func, select
+from sqlalchemy.orm import Session, aliased
+
+from . import db
+from .models import Event, EventStatus, Genre, Ticket, Order
+from .pagination import keyset_page
+
+
+# Plain, session-free copy of the Event fields the homepage cards render
+EventCard = namedtuple(
+    "EventCard", "id title photo photo_variant event_date venue status genre description"
+)
+
+TRENDING_SIZE = 6
+UPCOMING_SIZE = 6
+PREVIOUS_SIZE = 6
+GENRE_SHELF_SIZE = 2
+
+# Template variable -> genre for the "Top Genres" shelves
+GENRE_SHELVES = {
+    "grunge_events": Genre.GRUNGE,
+    "seventies_events": Genre.SEVENTIES,
+    "southern_rock_events": Genre.SOUTHERN,
+    "metal_events": Genre.METAL,
+}
+
+# Writes to these tables change what the homepage shows
+WATCHED_MODELS = (Event, Ticket, Order)
+WATCHED_TABLES = {model.__tablename__ for model in WATCHED_MODELS}
+
+
+def _card(event):
+    return EventCard(
+        id=event.id,
+        title=event.title,
+        photo=event.photo,
+        photo_variant=event.photo_variant,
+        event_date=event.event_date,
+        venue=event.venue,
+        status=event.current_status,
+        genre=event.genre,
+        description=event.description,
+    )
+
+
+def build_shelves(today):
+    """Query every homepage shelf and return them as template variables."""
+    # Trending events (most tickets sold, not sold out, upcoming)
+    trending_events = (
+        Event.query.filter(Event.event_date >= today, Event.status != EventStatus.INACTIVE)
+        .filter((Event.attendees.is_(None)) | (Event.tickets_sold < Event.attendees))
+        .order_by(Event.tickets_sold.desc())
+        .limit(TRENDING_SIZE)
+        .all()
+    )
+
+    # Upcoming events
+    upcoming_events = (
+        Event.query.filter(Event.event_date >= today, Event.status != EventStatus.INACTIVE)
+        .order_by(Event.event_date.asc())
+        .limit(UPCOMING_SIZE)
+        .all()
+    )
+
+    # Previous (inactive) events: first keyset page only, the rest is on /previous-events
+    previous_page = keyset_page(
+        Event.query.filter(Event.has_current_status(EventStatus.INACTIVE, today)),
+        [Event.event_date, Event.id],
+        per_page=PREVIOUS_SIZE,
+        descending=True,
+    )
+
+    # All genre shelves in one pass: rank events within each genre, keep the top N
+    ranked = (
+        select(
+            Event,
+            func.row_number().over(partition_by=Event.genre, order_by=Event.id).label("genre_rank"),
+        )
+        .where(Event.genre.in_(GENRE_SHELVES.values()))
+        .subquery()
+    )
+    ranked_event = aliased(Event, ranked)
+    genre_events = db.session.scalars(
+        select(ranked_event)
+        .where(ranked.c.genre_rank <= GENRE_SHELF_SIZE)
+        .order_by(ranked.c.genre, ranked.c.genre_rank)
+    ).all()
+
+    shelves = {
+        "trending_events": [_card(e) for e in trending_events],
+        "upcoming_events": [_card(e) for e in upcoming_events],
+        "previous_events": [_card(e) for e in previous_page.items],
+    }
+    for name, genre in GENRE_SHELVES.items():
+        shelves[name] = [_card(e) for e in genre_events if e.genre == genre]
+    return shelves
+
+
+class HomepageCache:
+    """Process-local homepage snapshot.
+
+    Rebuilt lazily after a commit touching events, tickets or orders, when the
+    date rolls over, or after max_age seconds (to pick up writes made by other
+    worker processes).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._snapshot = None
+        self._generation = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+    def _fresh(self, snapshot, today, max_age):
+        return (
+            snapshot is not None
+            and snapshot["built_on"] == today
+            and time.monotonic() - snapshot["built_at"] < max_age
+        )
+
+    def get(self):
+        today = datetime.now().date()
+        max_age = current_app.config.get("HOMEPAGE_CACHE_SECONDS", 60)
+
+        snapshot = self._snapshot
+        if self._fresh(snapshot, today, max_age):
+            return snapshot["shelves"]
+
+        # Only one thread rebuilds; the rest wait and reuse its result
+        with self._build_lock:
+            snapshot = self._snapshot
+            if self._fresh(snapshot, today, max_age):
+                return snapshot["shelves"]
+
+            generation = self._generation
+            shelves = build_shelves(today)
+            with self._lock:
+                # A write committed mid-build makes this snapshot stale; serve it once but don't keep it
+                if generation == self._generation:
+                    self._snapshot = {
+                        "shelves": shelves,
+                        "built_on": today,
+                        "built_at": time.monotonic(),
+                    }
+            return shelves
+
+
+homepage_cache = HomepageCache()
+
+
+# Invalidate the snapshot whenever a transaction that touched the catalogue commits
+
+@sa_event.listens_for(Session, "before_flush")
+def _track_unit_of_work(session, flush_context, instances):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, WATCHED_MODELS):
+            session.info["homepage_dirty"] = True
+            return
+
+
+@sa_event.listens_for(Session, "do_orm_execute")
+def _track_bulk_writes(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None and table.name in WATCHED_TABLES:
+            orm_execute_state.session.info["homepage_dirty"] = True
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("homepage_dirty", False):
+        homepage_cache.invalidate()
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop("homepage_dirty", None)
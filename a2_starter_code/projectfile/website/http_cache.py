@@ -0,0 +1,140 @@
+import hashlib
+import os
+import time
+from datetime import datetime, time as dtime, timedelta, timezone
+
+from flask import abort, current_app, make_response, request, session
+from flask_login import current_user
+from sqlalchemy import func, select
+from werkzeug.http import is_resource_modified
+
+from . import db
+from .models import Event
+
+
+# Conditional GET for the public pages. Anonymous visitors all get the same
+# HTML, so their responses carry validators and shared-cache headers, and a
+# matching If-None-Match is answered with a 304 before anything renders.
+# Signed-in pages show the user's name and flashes, so they stay private.
+
+_template_digest = None
+
+
+def event_etag(event_id, version, event_date):
+    """Strong ETag for one event's representation.
+
+    current_status flips to INACTIVE at midnight without a write, so whether
+    the event is past is part of the tag as well as its version.
+    """
+    phase = "past" if event_date < datetime.now().date() else "live"
+    return f"event-{event_id}-v{version}-{phase}"
+
+
+def start_of_day(day):
+    """Local midnight at the start of `day`, as naive UTC like the updated_at columns."""
+    return datetime.combine(day, dtime.min).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def newest(*moments):
+    """The latest of some datetimes, skipping None; None if there are none."""
+    return max((moment for moment in moments if moment is not None), default=None)
+
+
+def event_state(event_id):
+    """(etag, last_modified) from the version columns alone, or 404.
+
+    Once the event is past, last_modified is at least the midnight it became
+    past, so a client revalidating with only If-Modified-Since sees the flip.
+    """
+    row = db.session.execute(
+        select(Event.version, Event.event_date, Event.updated_at, Event.created_at).where(Event.id == event_id)
+    ).first()
+    if row is None:
+        abort(404)
+    last_modified = row.updated_at or row.created_at
+    if row.event_date < datetime.now().date():
+        last_modified = newest(last_modified, start_of_day(row.event_date + timedelta(days=1)))
+    return event_etag(event_id, row.version, row.event_date), last_modified
+
+
+def catalogue_state():
+    """(etag, last_modified) for pages listing the whole catalogue.
+
+    Every write to an event moves its updated_at, and new events take a
+    higher id. Each max() is its own subquery so both stay index lookups.
+    Which events are upcoming changes at midnight, so the tag carries the
+    date and last_modified is never before the start of today.
+    """
+    last_modified, last_id = db.session.execute(select(
+        select(func.max(Event.updated_at)).scalar_subquery(),
+        select(func.max(Event.id)).scalar_subquery(),
+    )).one()
+    today = datetime.now().date()
+    stamp = last_modified.strftime("%Y%m%d%H%M%S%f") if last_modified else "0"
+    return f"catalogue-{last_id or 0}-{stamp}-{today:%Y%m%d}", newest(last_modified, start_of_day(today))
+
+
+def _templates_digest():
+    """Short digest of the template files, so a deploy changes every page tag.
+
+    Worked out once per process, or on every call while Jinja auto-reloads
+    templates (development), so edits show up without a restart.
+    """
+    global _template_digest
+    if _template_digest is None or current_app.jinja_env.auto_reload:
+        sha = hashlib.sha256()
+        folder = os.path.join(current_app.root_path, current_app.template_folder)
+        for root, _dirs, files in sorted(os.walk(folder)):
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                sha.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        _template_digest = sha.hexdigest()[:8]
+    return _template_digest
+
+
+def is_public_request():
+    """True when the page is the same for everyone: signed out, nothing flashed."""
+    return not current_user.is_authenticated and "_flashes" not in session
+
+
+def cached_page(validators, render):
+    """Serve render() with HTTP caching for anonymous visitors.
+
+    validators() returns (etag, last_modified) cheaply, without what the
+    page itself needs; when the client's copy still matches, render() is
+    never called. Signed-in visitors always get a fresh, private page.
+    """
+    if not is_public_request():
+        response = make_response(render())
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    etag, last_modified = validators()
+    etag = f"{_templates_digest()}-{etag}"
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = make_response(render())
+    else:
+        response = make_response("", 304)
+
+    # Weak: the same page may be sent gzipped, brotli'd or as-is
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers["Cache-Control"] = (
+        f"public, max-age={current_app.config['PUBLIC_PAGE_MAX_AGE']}, "
+        f"stale-while-revalidate={current_app.config['PUBLIC_PAGE_STALE_SECONDS']}"
+    )
+    response.vary.add("Cookie")  # a signed-in visitor must not get the shared copy
+    return response
+
+
+def facet_window():
+    """Tag part that rolls over as often as the cached /events facet counts can change."""
+    window = current_app.config["FACET_CACHE_SECONDS"]
+    return int(time.time() // window) if window else 0
+
+
+def facet_window_start():
+    """When the current facet window began (naive UTC), or None when the counts aren't cached."""
+    window = current_app.config["FACET_CACHE_SECONDS"]
+    return datetime.utcfromtimestamp(facet_window() * window) if window else None
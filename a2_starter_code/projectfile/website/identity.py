@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from flask import current_app
+from flask_login import UserMixin
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session
+
+from . import db
+from .models import User
+
+
+class UserIdentity(namedtuple("UserIdentity", "id username email"), UserMixin):
+    """What an authenticated request needs to know about its user.
+
+    Stands in for the User row as `current_user`; load the full User when a
+    view needs relationships or the password hash.
+    """
+
+    def get_id(self):
+        return str(self.id)
+
+
+class UserIdentityCache:
+    """Process-local LRU of user identities with a time-to-live.
+
+    Entries are dropped when a transaction that changed or deleted the user
+    commits, and expire after max_age seconds (to pick up writes made by other
+    worker processes).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # id -> (identity, loaded_at), least recently used first
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, user_id):
+        max_age = current_app.config["USER_CACHE_SECONDS"]
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and time.monotonic() - entry[1] < max_age:
+                self._entries.move_to_end(user_id)
+                return entry[0]
+
+        row = db.session.execute(
+            db.select(User.id, User.username, User.email).where(User.id == user_id)
+        ).first()
+        identity = UserIdentity(*row) if row else None
+        if identity is not None:
+            with self._lock:
+                self._entries[user_id] = (identity, time.monotonic())
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > current_app.config["USER_CACHE_SIZE"]:
+                    self._entries.popitem(last=False)
+        return identity
+
+
+user_cache = UserIdentityCache()
+
+
+def load_user(user_id):
+    """Flask-Login user loader: a cached UserIdentity, or None for unknown ids."""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    return user_cache.get(user_id)
+
+
+# Drop cached identities once a transaction that changed those users commits
+
+@sa_event.listens_for(Session, "before_flush")
+def _track_users(session, flush_context, instances):
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            session.info.setdefault("changed_users", set()).add(obj.id)
+
+
+@sa_event.listens_for(Session, "do_orm_execute")
+def _track_bulk_user_writes(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None and table.name == User.__tablename__:
+            # Can't tell which rows a bulk statement hits; forget everyone
+            orm_execute_state.session.info["changed_users_all"] = True
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _invalidate_users_on_commit(session):
+    if session.info.pop("changed_users_all", False):
+        user_cache.clear()
+    user_cache.invalidate(*session.info.pop("changed_users", ()))
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _forget_users_on_rollback(session):
+    session.info.pop("changed_users", None)
+    session.info.pop("changed_users_all", None)
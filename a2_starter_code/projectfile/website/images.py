@@ -0,0 +1,141 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import url_for
+from markupsafe import Markup, escape
+from sqlalchemy import update
+
+from . import db
+from .models import Event, EventImage
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow missing: keep serving the uploaded originals
+    Image = None
+
+
+# Resized variants per role: srcset widths, fallback <img src> width and `sizes` hint
+ROLES = {
+    "card": {"widths": (320, 640), "sizes": "(min-width: 1200px) 16vw, (min-width: 576px) 50vw, 100vw"},
+    "detail": {"widths": (640, 1200), "sizes": "(min-width: 768px) 50vw, 100vw"},
+    "carousel": {"widths": (960, 1920), "sizes": "100vw"},
+}
+EVENT_PHOTO_ROLES = ("card", "detail")
+CAROUSEL_ROLES = ("carousel",)
+
+VARIANT_DIR = "variants"
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _variant_name(stem, role, width, ext):
+    return f"{stem}-{role}-{width}.{ext}"
+
+
+def make_variants(upload_folder, filename, roles):
+    """Write resized, metadata-free WebP and JPEG copies of an uploaded image.
+
+    Returns the variant stem (relative to the upload folder) to store on the
+    record, or None if the file can't be processed.
+    """
+    source = os.path.join(upload_folder, filename)
+    with open(source, "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()[:10]
+    base = os.path.splitext(filename)[0]
+    stem = f"{VARIANT_DIR}/{base}-{digest}"
+    os.makedirs(os.path.join(upload_folder, VARIANT_DIR), exist_ok=True)
+
+    with Image.open(source) as original:
+        # Bake in the EXIF rotation, then drop EXIF/ICC/etc. by not passing them on save
+        image = ImageOps.exif_transpose(original).convert("RGB")
+
+    for role in roles:
+        for width in ROLES[role]["widths"]:
+            resized = image.copy()
+            resized.thumbnail((width, width * 4), Image.LANCZOS)
+            target = os.path.join(upload_folder, _variant_name(stem, role, width, "{ext}"))
+            resized.save(target.format(ext="webp"), "WEBP", quality=WEBP_QUALITY, method=4)
+            resized.save(target.format(ext="jpg"), "JPEG", quality=JPEG_QUALITY,
+                         optimize=True, progressive=True)
+    return stem
+
+
+def _process(app, model, record_id, filename, roles):
+    with app.app_context():
+        try:
+            stem = make_variants(app.config["UPLOAD_FOLDER"], filename, roles)
+        except (OSError, ValueError):
+            app.logger.exception("Could not build image variants for %s", filename)
+            return
+        if model is Event:
+            # Only attach if the event still uses this photo
+            statement = update(Event).where(Event.id == record_id, Event.photo == filename) \
+                .values(photo_variant=stem, **Event.bumped_version())
+        else:
+            statement = update(EventImage).where(EventImage.id == record_id, EventImage.filename == filename) \
+                .values(variant=stem)
+        db.session.execute(statement.execution_options(synchronize_session=False))
+        db.session.commit()
+
+
+def _submit(app, *job):
+    global _executor
+    workers = app.config["IMAGE_WORKERS"]
+    if not workers:
+        _process(app, *job)
+        return
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-worker")
+    _executor.submit(_process, app, *job)
+
+
+def queue_event_images(app, event):
+    """Hand an event's unprocessed photo and carousel images to the worker pool.
+
+    Call after the upload has been committed; the request doesn't wait.
+    """
+    if Image is None:
+        return
+    if event.photo and not event.photo_variant:
+        _submit(app, Event, event.id, event.photo, EVENT_PHOTO_ROLES)
+    for img in event.images:
+        if not img.variant:
+            _submit(app, EventImage, img.id, img.filename, CAROUSEL_ROLES)
+
+
+def _srcset(variant, role, ext):
+    return ", ".join(
+        f'{url_for("static", filename="uploads/" + _variant_name(variant, role, w, ext))} {w}w'
+        for w in ROLES[role]["widths"]
+    )
+
+
+def image_attrs(filename, variant, role, default="default.jpg"):
+    """`src`/`srcset`/`sizes` attributes for an <img>, preferring resized JPEG variants."""
+    if not filename:
+        return Markup(f'src="{escape(url_for("static", filename=default))}"')
+    if not variant:
+        return Markup(f'src="{escape(url_for("static", filename="uploads/" + filename))}"')
+
+    spec = ROLES[role]
+    src = url_for("static", filename="uploads/" + _variant_name(variant, role, spec["widths"][-1], "jpg"))
+    return Markup(
+        f'src="{escape(src)}" srcset="{escape(_srcset(variant, role, "jpg"))}" '
+        f'sizes="{escape(spec["sizes"])}" loading="lazy"'
+    )
+
+
+def image_source(variant, role):
+    """WebP <source> to put ahead of the <img> inside a <picture>; empty until variants exist."""
+    if not variant:
+        return Markup("")
+    return Markup(
+        f'<source type="image/webp" srcset="{escape(_srcset(variant, role, "webp"))}" '
+        f'sizes="{escape(ROLES[role]["sizes"])}">'
+    )
@@ -0,0 +1,257 @@
+import csv
+import json
+import time as clock
+from datetime import date, datetime, time
+from contextlib import nullcontext
+from itertools import islice
+
+from sqlalchemy import func, insert, select
+
+from . import db
+from .models import Event, EventImage, EventStatus, Genre, OrganisationType, Ticket
+from .search import index_inserted_events, search_index_exists, without_insert_trigger
+
+
+# Catalogue import: rows stream through parse -> validate -> batch -> insert, so
+# memory stays flat however large the file is.
+#
+# CSV columns: title, event_date (YYYY-MM-DD), start_time, end_time (HH:MM), venue,
+# genre, organisation, attendees, description, status, photo, tickets, images.
+# `tickets` is "GA:50;VIP:120.50" (type:price pairs) and `images` is "a.jpg;b.jpg".
+# JSONL rows use the same keys, with `tickets` as [{"type": ..., "price": ...}]
+# and `images` as a list of filenames (relative to static/uploads).
+
+BATCH_SIZE = 5000
+
+
+class RowError(ValueError):
+    """A row that can't be imported; the message says why."""
+
+
+def read_rows(stream, fmt):
+    """Yield (line_number, dict) from a CSV or JSONL text stream."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as error:
+                yield line_number, RowError(f"invalid JSON: {error}")
+                continue
+            yield line_number, row if isinstance(row, dict) else RowError("expected a JSON object")
+
+
+def _enum_lookup(enum_class):
+    """Accept an enum's value ("70s") or name ("SEVENTIES"), case-insensitively."""
+    lookup = {member.value.lower(): member for member in enum_class}
+    lookup.update((member.name.lower(), member) for member in enum_class)
+    return lookup
+
+
+ENUM_LOOKUPS = {
+    "genre": _enum_lookup(Genre),
+    "organisation": _enum_lookup(OrganisationType),
+    "status": _enum_lookup(EventStatus),
+}
+
+
+def _enum(row, field):
+    value = row.get(field)
+    if value in (None, ""):
+        return None
+    try:
+        return ENUM_LOOKUPS[field][str(value).strip().lower()]
+    except KeyError:
+        raise RowError(f"{field}: unknown value {value!r}") from None
+
+
+def _required(row, field):
+    value = row.get(field)
+    if value in (None, "") or not str(value).strip():
+        raise RowError(f"{field}: required")
+    return str(value).strip()
+
+
+def _parse_time(row, field):
+    value = _required(row, field)
+    try:
+        if len(value) != 5:
+            raise ValueError
+        return time.fromisoformat(value)
+    except ValueError:
+        raise RowError(f"{field}: expected HH:MM") from None
+
+
+def _tickets(value):
+    if value in (None, ""):
+        return []
+    if isinstance(value, str):
+        pairs = [part.rsplit(":", 1) for part in value.split(";") if part.strip()]
+        if any(len(pair) != 2 for pair in pairs):
+            raise RowError("tickets: expected type:price;type:price")
+        value = [{"type": ticket_type, "price": price} for ticket_type, price in pairs]
+    tickets = []
+    for ticket in value:
+        try:
+            ticket_type = str(ticket["type"]).strip()
+            price = float(ticket["price"])
+        except (KeyError, TypeError, ValueError):
+            raise RowError(f"tickets: bad tier {ticket!r}") from None
+        if not ticket_type or price < 0:
+            raise RowError(f"tickets: bad tier {ticket!r}")
+        tickets.append({"ticket_type": ticket_type, "price": price})
+    return tickets
+
+
+def _images(value):
+    if value in (None, ""):
+        return []
+    if isinstance(value, str):
+        value = value.split(";")
+    return [str(name).strip() for name in value if str(name).strip()]
+
+
+def parse_row(row, owner_id):
+    """Validate one input row into (event values, ticket rows, image filenames)."""
+    value = _required(row, "event_date")
+    try:
+        if len(value) != 10:
+            raise ValueError
+        event_date = date.fromisoformat(value)
+    except ValueError:
+        raise RowError("event_date: expected YYYY-MM-DD") from None
+    attendees = row.get("attendees")
+    try:
+        attendees = int(attendees) if attendees not in (None, "") else None
+    except (TypeError, ValueError):
+        raise RowError("attendees: expected a whole number") from None
+    if attendees is not None and attendees < 0:
+        raise RowError("attendees: must not be negative")
+
+    tickets = _tickets(row.get("tickets"))
+    now = datetime.utcnow()
+    event = {
+        "title": _required(row, "title")[:200],
+        "event_date": event_date,
+        "start_time": _parse_time(row, "start_time"),
+        "end_time": _parse_time(row, "end_time"),
+        "venue": _required(row, "venue")[:255],
+        "genre": _enum(row, "genre"),
+        "organisation": _enum(row, "organisation"),
+        "status": _enum(row, "status") or EventStatus.OPEN,
+        "attendees": attendees,
+        "description": row.get("description") or None,
+        "photo": (row.get("photo") or "").strip() or None,
+        "user_id": owner_id,
+        "tickets_sold": 0,
+        "min_price": min((ticket["price"] for ticket in tickets), default=None),
+        "comment_count": 0,
+        "version": 1,
+        "created_at": now,
+        "updated_at": now,
+    }
+    return event, tickets, _images(row.get("images"))
+
+
+def parsed_rows(rows, owner_id, on_error):
+    """Yield parsed rows, reporting bad ones to on_error(line_number, message)."""
+    for line_number, row in rows:
+        try:
+            if isinstance(row, RowError):
+                raise row
+            yield parse_row(row, owner_id)
+        except RowError as error:
+            on_error(line_number, str(error))
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def bulk_insert(table, rows):
+    """One DB-API executemany for a list of same-keyed dicts.
+
+    Values go through the columns' own bind processors once up front, which
+    skips SQLAlchemy's per-row parameter handling (the bulk of the cost at
+    this volume).
+    """
+    if not rows:
+        return
+    connection = db.session.connection()
+    dialect = connection.dialect
+    names = [column.key for column in table.c if column.key in rows[0]]  # compiled column order
+    processors = [table.c[name].type.dialect_impl(dialect).bind_processor(dialect) for name in names]
+    statement = insert(table).compile(dialect=dialect, column_keys=names)
+    connection.exec_driver_sql(str(statement), [
+        tuple(process(row[name]) if process else row[name] for name, process in zip(names, processors))
+        for row in rows
+    ])
+
+
+def insert_batch(batch):
+    """Insert one batch of events with their tickets and images in one transaction.
+
+    Each table gets a single executemany. SQLite hands out rowids as max + 1,
+    and this transaction holds the write lock throughout, so the new events
+    have consecutive ids ending at last_insert_rowid(); that is checked
+    before the children are attached.
+    """
+    # Take the write lock up front (the driver would only BEGIN at the first INSERT):
+    # the consecutive ids and the trigger swap below both rely on holding it
+    connection = db.session.connection()
+    if not connection.connection.driver_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    events = Event.__table__
+    indexed = search_index_exists()
+    # Search index rows go in with one INSERT ... SELECT rather than a trigger per event
+    with without_insert_trigger() if indexed else nullcontext():
+        bulk_insert(events, [event for event, _, _ in batch])
+        last_id = db.session.scalar(select(func.last_insert_rowid()))
+    event_ids = range(last_id - len(batch) + 1, last_id + 1)
+    owners = {event["user_id"] for event, _, _ in batch}
+    owned = db.session.scalar(
+        select(func.count()).select_from(events)
+        .where(events.c.id.between(event_ids[0], last_id), events.c.user_id.in_(owners))
+    )
+    if owned != len(batch):
+        db.session.rollback()
+        raise RuntimeError("Imported event ids were not consecutive; nothing from this batch was saved.")
+    if indexed:
+        index_inserted_events(event_ids[0], last_id)
+    tickets = [dict(ticket, event_id=event_id, tickets_sold=0)
+               for event_id, (_, event_tickets, _) in zip(event_ids, batch) for ticket in event_tickets]
+    images = [{"event_id": event_id, "filename": filename}
+              for event_id, (_, _, filenames) in zip(event_ids, batch) for filename in filenames]
+    bulk_insert(Ticket.__table__, tickets)
+    bulk_insert(EventImage.__table__, images)
+    db.session.commit()
+    return len(event_ids), len(tickets), len(images)
+
+
+def import_events(rows, owner_id, batch_size=BATCH_SIZE, on_error=None, on_progress=None):
+    """Stream rows into the database. Returns totals as a dict."""
+    totals = {"events": 0, "tickets": 0, "images": 0, "errors": 0}
+    started = clock.perf_counter()
+
+    def error(line_number, message):
+        totals["errors"] += 1
+        if on_error:
+            on_error(line_number, message)
+
+    for batch in batched(parsed_rows(rows, owner_id, error), batch_size):
+        events, tickets, images = insert_batch(batch)
+        totals["events"] += events
+        totals["tickets"] += tickets
+        totals["images"] += images
+        if on_progress:
+            on_progress(totals, clock.perf_counter() - started)
+    totals["seconds"] = clock.perf_counter() - started
+    return totals
@@ -0,0 +1,115 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+from flask import abort, current_app, g, has_request_context, jsonify, request
+from sqlalchemy import event
+
+from . import db
+
+
+slow_query_log = logging.getLogger("website.slow_query")
+
+# Summaries of the most recent requests, newest last, for /_debug/queries
+_recent = deque(maxlen=50)
+_recent_lock = threading.Lock()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+
+    threshold = None
+    if has_request_context():
+        stats = g.get("sql_stats")
+        if stats is not None:
+            stats["count"] += 1
+            stats["db_ms"] += elapsed_ms
+            stats["statements"].append((elapsed_ms, statement))
+        threshold = current_app.config["SLOW_QUERY_MS"]
+    if threshold is not None and elapsed_ms >= threshold:
+        slow_query_log.warning(json.dumps({
+            "event": "slow_query",
+            "ms": round(elapsed_ms, 2),
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "statement": " ".join(statement.split()),
+        }))
+
+
+def _start_request():
+    g.sql_stats = {"count": 0, "db_ms": 0.0, "statements": [], "started": time.perf_counter()}
+
+
+def _finish_request(response):
+    stats = g.get("sql_stats")
+    if stats is None:
+        return response
+
+    summary = {
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "endpoint": request.endpoint,
+        "status": response.status_code,
+    }
+    top = current_app.config["SQL_TOP_STATEMENTS"]
+    if response.is_streamed:
+        # The body renders, and queries, after this hook; g.sql_stats keeps counting
+        # until the server closes the response. The headers are already gone by
+        # then, so streamed pages show up in /_debug/queries but not Server-Timing
+        response.call_on_close(lambda: _record(summary, stats, top))
+        return response
+
+    g.pop("sql_stats")
+    total_ms = _record(summary, stats, top)
+    response.headers.add(
+        "Server-Timing",
+        f'db;dur={stats["db_ms"]:.2f};desc="{stats["count"]} queries", app;dur={total_ms:.2f}',
+    )
+    return response
+
+
+def _record(summary, stats, top):
+    """Add a finished request to the recent log; returns its total time in ms."""
+    total_ms = (time.perf_counter() - stats["started"]) * 1000
+    slowest = sorted(stats["statements"], key=lambda item: item[0], reverse=True)[:top]
+    with _recent_lock:
+        _recent.append({
+            **summary,
+            "queries": stats["count"],
+            "db_ms": round(stats["db_ms"], 2),
+            "total_ms": round(total_ms, 2),
+            "slowest": [{"ms": round(ms, 2), "statement": " ".join(sql.split())} for ms, sql in slowest],
+        })
+    return total_ms
+
+
+def debug_queries():
+    """Per-request SQL stats for the last QUERY_LOG_SIZE requests (opt-in)."""
+    if not current_app.config["QUERY_DEBUG_VIEW"]:
+        abort(404)
+    with _recent_lock:
+        requests = list(_recent)
+    return jsonify(requests=requests[::-1])
+
+
+def init_instrumentation(app):
+    """Count and time every SQL statement per request, report via Server-Timing."""
+    global _recent
+    _recent = deque(_recent, maxlen=app.config["QUERY_LOG_SIZE"])
+
+    with app.app_context():
+        engines = list(db.engines.values())  # the writer and, if split, the read pool
+    for engine in engines:
+        if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule("/_debug/queries", "debug_queries", debug_queries)
@@ -0,0 +1,168 @@
+from datetime import datetime
+
+from sqlalchemy import text
+
+from . import db
+from .schema import add_missing_columns, create_missing_indexes
+
+
+# (version, description, function), applied in version order
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def register(function):
+        MIGRATIONS.append((version, description, function))
+        MIGRATIONS.sort(key=lambda entry: entry[0])
+        return function
+    return register
+
+
+# Every migration is idempotent: databases that predate this runner may
+# already have some of these changes, and fresh ones get the current
+# schema from db.create_all() before the runner starts.
+
+@migration(1, "tickets_sold counters on events and tickets")
+def add_ticket_counters():
+    # Plain SQL: later migrations add columns the current models expect
+    for table, key in (("events", "event_id"), ("tickets", "ticket_id")):
+        if add_missing_columns(table, {"tickets_sold": "INTEGER NOT NULL DEFAULT 0"}):
+            db.session.execute(text(
+                f"UPDATE {table} SET tickets_sold = "
+                f"(SELECT COALESCE(SUM(quantity), 0) FROM orders WHERE orders.{key} = {table}.id)"
+            ))
+
+
+@migration(2, "FTS5 search index over events")
+def add_search_index():
+    from .search import create_search_index
+
+    create_search_index()
+
+
+@migration(3, "resized image variant columns")
+def add_image_variant_columns():
+    add_missing_columns("events", {"photo_variant": "VARCHAR(255)"})
+    add_missing_columns("event_images", {"variant": "VARCHAR(255)"})
+
+
+@migration(4, "composite indexes for hot lookups")
+def add_hot_path_indexes():
+    from .models import Event, EventImage, Ticket, Comment, Order
+
+    for model in (Event, EventImage, Ticket, Comment, Order):
+        create_missing_indexes(model.__table__)
+
+
+@migration(5, "version stamps on events")
+def add_event_versions():
+    add_missing_columns("events", {
+        "version": "INTEGER NOT NULL DEFAULT 1",
+        "updated_at": "DATETIME",
+    })
+
+
+@migration(6, "comment_count counter on events")
+def add_comment_counts():
+    if add_missing_columns("events", {"comment_count": "INTEGER NOT NULL DEFAULT 0"}):
+        db.session.execute(text(
+            "UPDATE events SET comment_count = "
+            "(SELECT COUNT(*) FROM comments WHERE comments.event_id = events.id)"
+        ))
+
+
+@migration(7, "daily sales rollup and organiser index for the sales dashboard")
+def add_daily_sales():
+    from .models import DailySales, Event
+    from .sales import rebuild_sales_rollup
+
+    create_missing_indexes(Event.__table__, ["ix_events_user_id"])
+    # create_all may already have made the (empty) table, so backfill whenever it is empty
+    DailySales.__table__.create(db.session.connection(), checkfirst=True)
+    if db.session.execute(db.select(DailySales.id).limit(1)).first() is None:
+        rebuild_sales_rollup()
+
+
+@migration(8, "min_price on events and the /events facet index")
+def add_min_prices():
+    from .models import Event
+
+    if add_missing_columns("events", {"min_price": "FLOAT"}):
+        db.session.execute(text(
+            "UPDATE events SET min_price = (SELECT MIN(price) FROM tickets WHERE tickets.event_id = events.id)"
+        ))
+    create_missing_indexes(Event.__table__, ["ix_events_facets"])
+
+
+@migration(9, "waiting room admission rate on events")
+def add_admission_rates():
+    add_missing_columns("events", {"admission_rate": "INTEGER"})
+
+
+@migration(10, "archive table for past-event orders")
+def add_archived_orders():
+    from .models import ArchivedOrder
+
+    # Filled by `flask archive-orders` and the background sweeper, not here
+    ArchivedOrder.__table__.create(db.session.connection(), checkfirst=True)
+    create_missing_indexes(ArchivedOrder.__table__)
+
+
+@migration(11, "updated_at index for the catalogue validators")
+def add_updated_at_index():
+    from .models import Event
+
+    create_missing_indexes(Event.__table__, ["ix_events_updated_at"])
+
+
+@migration(12, "date-ordered search keys and longer prefixes for the FTS5 index")
+def add_search_keys():
+    from .search import create_search_index
+
+    # Rebuilds an index made by migration 2 before search_key existed
+    create_search_index()
+
+
+def _ensure_version_table():
+    db.session.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, description VARCHAR(255) NOT NULL, applied_at DATETIME NOT NULL)"
+    ))
+    db.session.commit()
+
+
+def current_version():
+    _ensure_version_table()
+    return db.session.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")).scalar()
+
+
+def pending_migrations():
+    version = current_version()
+    return [entry for entry in MIGRATIONS if entry[0] > version]
+
+
+def create_schema():
+    """Create missing tables, then apply pending migrations. Returns what ran."""
+    from . import models  # register the tables, even if nothing imported them yet
+    db.create_all()
+    # create_all never alters existing tables; versioned migrations do
+    return upgrade()
+
+
+def upgrade():
+    """Apply pending migrations, each in its own transaction. Returns what ran."""
+    applied = []
+    for version, description, function in pending_migrations():
+        try:
+            function()
+            db.session.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) "
+                     "VALUES (:version, :description, :applied_at)"),
+                {"version": version, "description": description, "applied_at": datetime.utcnow()},
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        applied.append((version, description))
+    return applied
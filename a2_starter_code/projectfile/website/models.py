@@ -1,6 +1,8 @@
 import enum
 from datetime import datetime
 from flask_login import UserMixin
+from sqlalchemy import literal, select, union_all
+from sqlalchemy.orm import selectinload
 from . import db
 
 
@@ -57,6 +59,15 @@ class Genre(enum.Enum):
 
 class Event(db.Model):
     __tablename__ = 'events'
+    __table_args__ = (
+        db.Index("ix_events_event_date_status", "event_date", "status"),  # upcoming/past shelves
+        db.Index("ix_events_status_event_date", "status", "event_date"),  # /events status filter
+        db.Index("ix_events_genre", "genre"),  # homepage genre shelves
+        db.Index("ix_events_user_id", "user_id"),  # organiser pages (edit, sales)
+        # Covers the /events facet counts, so they read the index rather than the table
+        db.Index("ix_events_facets", "status", "event_date", "genre", "min_price"),
+        db.Index("ix_events_updated_at", "updated_at"),  # catalogue-wide Last-Modified / ETag
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -70,8 +81,20 @@ class Event(db.Model):
     description = db.Column(db.Text, nullable=True)
     status = db.Column(db.Enum(EventStatus), default=EventStatus.OPEN, nullable=False)
     photo = db.Column(db.String(255), nullable=True)  # Main image
+    photo_variant = db.Column(db.String(255), nullable=True)  # Resized copies, set by the image workers
+    # Maintained by booking/cancellation, rebuilt by `flask reconcile-counters`
+    tickets_sold = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+    # Cheapest ticket tier (None without tiers), kept by pricing.py for the /events price filter
+    min_price = db.Column(db.Float, nullable=True)
+    # Maintained by add_event_comment, rebuilt by `flask reconcile-counters`
+    comment_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+    # Buyers admitted per minute through the waiting room (see waiting_room.py); None = no queue
+    admission_rate = db.Column(db.Integer, nullable=True)
+    # Bumped whenever the event, its tickets, images or comments change (see versioning.py)
+    version = db.Column(db.Integer, default=1, server_default="1", nullable=False)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     creator = db.relationship("User", back_populates="events")
 
@@ -88,19 +111,49 @@ class Event(db.Model):
     images = db.relationship(
         "EventImage", back_populates="event", lazy=True, cascade="all, delete-orphan"
     )
-    def check_and_update_status(self):
-        """Automatically set event as INACTIVE if the date has passed."""
-        today = datetime.utcnow().date()
-        if self.event_date < today and self.status != EventStatus.INACTIVE:
-            self.status = EventStatus.INACTIVE
-            db.session.commit()
+
+    @property
+    def tickets_left(self):
+        """Remaining capacity, or None when the event has no attendee limit."""
+        if self.attendees is None:
+            return None
+        return max(self.attendees - (self.tickets_sold or 0), 0)
+
+    @property
+    def is_past(self):
+        return self.event_date < datetime.now().date()
+
+    @property
+    def current_status(self):
+        """Status as readers should see it.
+
+        Past events read as INACTIVE straight away; the background sweeper
+        (`flask sweep-statuses`) persists that later in one bulk UPDATE.
+        """
+        if self.is_past:
+            return EventStatus.INACTIVE
+        return self.status
+
+    @classmethod
+    def bumped_version(cls):
+        """Extra .values() for bulk UPDATEs of events, so they move the version too."""
+        return {"version": cls.version + 1, "updated_at": datetime.utcnow()}
+
+    @classmethod
+    def has_current_status(cls, status, today):
+        """SQL filter matching events whose current_status is `status`."""
+        if status == EventStatus.INACTIVE:
+            return (cls.status == EventStatus.INACTIVE) | (cls.event_date < today)
+        return (cls.status == status) & (cls.event_date >= today)
 
 class EventImage(db.Model):
     __tablename__ = 'event_images'
+    __table_args__ = (db.Index("ix_event_images_event_id", "event_id"),)
 
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey("events.id"), nullable=False)
     filename = db.Column(db.String(255), nullable=False)
+    variant = db.Column(db.String(255), nullable=True)  # Resized copies, set by the image workers
 
     event = db.relationship("Event", back_populates="images")
 
@@ -108,10 +161,12 @@ class EventImage(db.Model):
 # Ticket Model
 class Ticket(db.Model):
     __tablename__ = 'tickets'
+    __table_args__ = (db.Index("ix_tickets_event_id", "event_id"),)
 
     id = db.Column(db.Integer, primary_key=True)
     ticket_type = db.Column(db.String(100), nullable=False)
     price = db.Column(db.Float, nullable=False)
+    tickets_sold = db.Column(db.Integer, default=0, server_default="0", nullable=False)
 
     # Foreign key to Event
     event_id = db.Column(db.Integer, db.ForeignKey("events.id"), nullable=False)
@@ -127,6 +182,7 @@ class Ticket(db.Model):
 # Comment Model
 class Comment(db.Model):
     __tablename__ = 'comments'
+    __table_args__ = (db.Index("ix_comments_event_created", "event_id", "created_at"),)
 
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
@@ -144,6 +200,12 @@ class Comment(db.Model):
 # Order Model
 class Order(db.Model):
     __tablename__ = 'orders'
+    __table_args__ = (
+        # book_tickets upsert; its user_id prefix also serves upcoming/history
+        db.Index("ix_orders_user_event_ticket", "user_id", "event_id", "ticket_id"),
+        db.Index("ix_orders_event_id", "event_id"),
+        db.Index("ix_orders_ticket_id", "ticket_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     price = db.Column(db.Float, nullable=False)
@@ -159,3 +221,69 @@ class Order(db.Model):
     user = db.relationship("User", back_populates="orders")
     event = db.relationship("Event", back_populates="orders")
     ticket = db.relationship("Ticket", back_populates="orders")
+
+
+# Orders for past events, moved out of `orders` by archive_past_orders (see archive.py)
+# so the table every booking writes to only holds upcoming events
+class ArchivedOrder(db.Model):
+    __tablename__ = 'archived_orders'
+    __table_args__ = (
+        db.Index("ix_archived_orders_user_event", "user_id", "event_id"),  # booking history
+        db.Index("ix_archived_orders_event_id", "event_id"),
+        db.Index("ix_archived_orders_ticket_id", "ticket_id"),
+    )
+
+    # Its own key: SQLite may hand a deleted order's id to a new order
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, nullable=False)  # the id it had in orders
+    price = db.Column(db.Float, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    order_date = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey("events.id"), nullable=False)
+    ticket_id = db.Column(db.Integer, db.ForeignKey("tickets.id"), nullable=False)
+
+
+def _order_history_select():
+    """Live and archived orders as one relation; `archived` tells them apart."""
+    def columns(model, archived, order_id):
+        return select(
+            literal(archived).label("archived"), model.id, order_id.label("order_id"), model.price,
+            model.quantity, model.order_date, model.user_id, model.event_id, model.ticket_id,
+        )
+    return union_all(
+        columns(Order, False, Order.id),
+        columns(ArchivedOrder, True, ArchivedOrder.order_id),
+    ).subquery("order_history")
+
+
+# Read-only view of every order a user has placed, wherever it is stored now
+class OrderHistory(db.Model):
+    __table__ = _order_history_select()
+    __mapper_args__ = {"primary_key": [__table__.c.archived, __table__.c.id]}
+
+    event = db.relationship("Event", primaryjoin="foreign(OrderHistory.event_id) == Event.id", viewonly=True)
+    ticket = db.relationship("Ticket", primaryjoin="foreign(OrderHistory.ticket_id) == Ticket.id", viewonly=True)
+
+
+# Net sales per ticket tier per day, kept by booking/cancellation (see sales.py)
+class DailySales(db.Model):
+    __tablename__ = 'daily_sales'
+    __table_args__ = (
+        db.UniqueConstraint("ticket_id", "day", name="uq_daily_sales_ticket_day"),  # the upsert key
+        db.Index("ix_daily_sales_event_day", "event_id", "day"),  # dashboard reads
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    tickets = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+    revenue = db.Column(db.Float, default=0.0, server_default="0", nullable=False)
+
+    event_id = db.Column(db.Integer, db.ForeignKey("events.id"), nullable=False)
+    ticket_id = db.Column(db.Integer, db.ForeignKey("tickets.id"), nullable=False)
+
+
+# Loading plan for pages that render an event with its carousel and ticket tiers
+EVENT_PAGE_LOADS = (selectinload(Event.images), selectinload(Event.tickets))
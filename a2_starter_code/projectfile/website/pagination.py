@@ -0,0 +1,106 @@
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import date, datetime
+
+from flask import request, url_for
+from sqlalchemy import tuple_
+
+
+PER_PAGE = 24
+MAX_PER_PAGE = 100
+
+Page = namedtuple("Page", "items next_cursor prev_cursor")
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+    return value
+
+
+def encode_cursor(direction, key):
+    payload = json.dumps({"dir": direction, "key": [_encode_value(v) for v in key]},
+                         separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return (direction, key) for a cursor, or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction = payload["dir"]
+        key = tuple(_decode_value(v) for v in payload["key"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        return None
+    if direction not in ("next", "prev"):
+        return None
+    return direction, key
+
+
+def keyset_page(query, sort_columns, cursor=None, per_page=PER_PAGE, descending=False):
+    """Fetch one page of `query` ordered by `sort_columns`, seeking past the cursor.
+
+    The last sort column must be unique (normally the primary key) so every
+    row has a distinct position. Each page costs one indexed range scan of
+    per_page + 1 rows, however deep the reader has paged.
+    """
+    position = decode_cursor(cursor)
+    if position and len(position[1]) != len(sort_columns):
+        position = None
+    backwards = position is not None and position[0] == "prev"
+    # Walking backwards reads the index in the opposite direction, then flips the page
+    reverse = descending != backwards
+
+    query = query.order_by(None)
+    if position:
+        row_key = tuple_(*sort_columns)
+        boundary = tuple_(*position[1], types=[column.type for column in sort_columns])
+        query = query.filter(row_key < boundary if reverse else row_key > boundary)
+
+    ordering = [column.desc() if reverse else column.asc() for column in sort_columns]
+    rows = query.add_columns(*sort_columns).order_by(*ordering).limit(per_page + 1).all()
+
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    items = [row[0] for row in rows]
+    keys = [tuple(row[1:]) for row in rows]
+    has_next = True if backwards else more
+    has_prev = more if backwards else position is not None
+
+    next_cursor = encode_cursor("next", keys[-1]) if keys and has_next else None
+    prev_cursor = encode_cursor("prev", keys[0]) if keys and has_prev else None
+    return Page(items, next_cursor, prev_cursor)
+
+
+def requested_page_size():
+    """Page size from ?per_page=, clamped to 1..MAX_PER_PAGE."""
+    per_page = request.args.get("per_page", PER_PAGE, type=int)
+    return max(1, min(per_page, MAX_PER_PAGE))
+
+
+def page_url(endpoint, cursor):
+    """URL for another page of the current listing, keeping its other query args."""
+    if not cursor:
+        return None
+    args = request.args.to_dict(flat=False)
+    args["cursor"] = cursor
+    return url_for(endpoint, **args)
@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import bcrypt
+from flask import abort, current_app, jsonify
+
+# bcrypt only reads the first 72 bytes; newer releases raise instead of truncating
+BCRYPT_MAX_BYTES = 72
+
+
+class HashQueueFull(Exception):
+    """Too many password hashes are already running or waiting; try again shortly."""
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = None  # bounds running + queued hashes
+
+_metrics_lock = threading.Lock()
+_metrics = {"hashed": 0, "checked": 0, "rehashed": 0, "rejected": 0, "timed_out": 0,
+            "in_flight": 0, "max_in_flight": 0}
+_latencies = deque(maxlen=500)  # seconds per hash, most recent last
+
+
+def _get_executor():
+    global _executor, _slots
+    with _executor_lock:
+        if _executor is None:
+            workers = current_app.config["PASSWORD_HASH_WORKERS"]
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+            _slots = threading.BoundedSemaphore(workers + current_app.config["PASSWORD_HASH_QUEUE"])
+    return _executor
+
+
+def _timed(function, *args):
+    started = time.perf_counter()
+    try:
+        return function(*args)
+    finally:
+        elapsed = time.perf_counter() - started
+        with _metrics_lock:
+            _latencies.append(elapsed)
+
+
+def _finished(future):
+    """Free the pool slot once a hash has really ended, even if its caller gave up waiting."""
+    _slots.release()
+    with _metrics_lock:
+        _metrics["in_flight"] -= 1
+
+
+def _run(kind, function, *args):
+    """Run a bcrypt call on the hash pool and wait for it, or raise HashQueueFull.
+
+    The request thread still blocks until the hash is done; the pool bounds
+    how many hashes run and queue at once, not how long a request waits.
+    The wait is capped at PASSWORD_HASH_TIMEOUT seconds, after which the
+    caller gets HashQueueFull (a 503) and the hash, if already running,
+    finishes in the background while still holding its slot.
+    """
+    executor = _get_executor()
+    if not _slots.acquire(blocking=False):
+        with _metrics_lock:
+            _metrics["rejected"] += 1
+        raise HashQueueFull()
+    with _metrics_lock:
+        _metrics["in_flight"] += 1
+        _metrics["max_in_flight"] = max(_metrics["max_in_flight"], _metrics["in_flight"])
+    future = executor.submit(_timed, function, *args)
+    future.add_done_callback(_finished)
+    try:
+        result = future.result(timeout=current_app.config["PASSWORD_HASH_TIMEOUT"])
+    except TimeoutError:
+        future.cancel()  # drops it if it is still queued
+        with _metrics_lock:
+            _metrics["timed_out"] += 1
+        raise HashQueueFull()
+    with _metrics_lock:
+        _metrics[kind] += 1
+    return result
+
+
+def _password_bytes(password):
+    return password.encode("utf-8")[:BCRYPT_MAX_BYTES]
+
+
+def hash_cost(password_hash):
+    """The log2 rounds a bcrypt hash was made with, e.g. 12 for '$2b$12$...'."""
+    try:
+        return int(password_hash.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def hash_password(password):
+    """bcrypt-hash a password at the configured BCRYPT_LOG_ROUNDS, off the request thread."""
+    salt = bcrypt.gensalt(rounds=current_app.config["BCRYPT_LOG_ROUNDS"])
+    return _run("hashed", bcrypt.hashpw, _password_bytes(password), salt).decode("utf-8")
+
+
+def check_password(user, password):
+    """Verify a user's password, upgrading the stored hash if the cost has changed.
+
+    The rehash is best effort: it is skipped when the hash queue is full. The
+    caller commits.
+    """
+    try:
+        valid = _run("checked", bcrypt.checkpw, _password_bytes(password), user.password_hash.encode("utf-8"))
+    except ValueError:  # not a bcrypt hash
+        return False
+    if valid and hash_cost(user.password_hash) != current_app.config["BCRYPT_LOG_ROUNDS"]:
+        try:
+            user.password_hash = hash_password(password)
+        except HashQueueFull:
+            pass
+        else:
+            with _metrics_lock:
+                _metrics["rehashed"] += 1
+    return valid
+
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def hash_metrics():
+    """Counters, current queue depth and recent latency percentiles (ms)."""
+    with _metrics_lock:
+        snapshot = dict(_metrics)
+        ordered = sorted(_latencies)
+    capacity = None
+    if _executor is not None:
+        capacity = current_app.config["PASSWORD_HASH_WORKERS"] + current_app.config["PASSWORD_HASH_QUEUE"]
+    snapshot["capacity"] = capacity
+    snapshot["cost"] = current_app.config["BCRYPT_LOG_ROUNDS"]
+    snapshot["latency_ms"] = {
+        name: round(value * 1000, 1) if value is not None else None
+        for name, value in (("p50", _percentile(ordered, 0.5)), ("p95", _percentile(ordered, 0.95)),
+                            ("max", ordered[-1] if ordered else None))
+    }
+    return snapshot
+
+
+def debug_password_hashing():
+    """Password hashing metrics (opt-in, like /_debug/queries)."""
+    if not current_app.config["QUERY_DEBUG_VIEW"]:
+        abort(404)
+    return jsonify(hash_metrics())
+
+
+def init_passwords(app):
+    app.add_url_rule("/_debug/password-hashing", "debug_password_hashing", debug_password_hashing)
@@ -0,0 +1,43 @@
+from itertools import chain
+
+from sqlalchemy import event as sa_event, func, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+
+from .models import Event, Ticket
+
+
+# Event.min_price is the cheapest ticket tier, kept up to date here so the
+# /events price filter and facets never join tickets.
+
+def min_price_of(event_id_column):
+    """Scalar subquery: the cheapest tier of the event in event_id_column."""
+    return select(func.min(Ticket.price)).where(Ticket.event_id == event_id_column).scalar_subquery()
+
+
+@sa_event.listens_for(Session, "after_flush")
+def _refresh_event_min_prices(session, flush_context):
+    """Recompute min_price for events whose tiers were added, changed or removed.
+
+    Bulk inserts (the importer, the seeder) set min_price themselves.
+    """
+    event_ids = {
+        obj.event_id for obj in chain(session.new, session.dirty, session.deleted)
+        if isinstance(obj, Ticket) and obj.event_id is not None
+    }
+    if not event_ids:
+        return
+    # The connection, not session.execute(): that would try to autoflush mid-flush
+    session.connection().execute(
+        update(Event).where(Event.id.in_(event_ids))
+        .values(min_price=min_price_of(Event.id))
+    )
+    session.info.setdefault("repriced_events", set()).update(event_ids)
+
+
+@sa_event.listens_for(Session, "after_flush_postexec")
+def _expire_stale_min_prices(session, flush_context):
+    for event_id in session.info.pop("repriced_events", ()):
+        event = session.identity_map.get(identity_key(Event, event_id))
+        if event is not None:
+            session.expire(event, ["min_price"])
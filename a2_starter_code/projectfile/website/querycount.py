@@ -0,0 +1,56 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from . import db
+
+
+@contextmanager
+def capture_statements():
+    """Record (statement, parameters) for every SQL statement run inside the block.
+
+    Needs an app context.
+    """
+    captured = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield captured
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", record)
+
+
+@contextmanager
+def count_queries():
+    """Record every SQL statement the app's engine runs inside the block.
+
+    Yields the list the statements are appended to. Needs an app context.
+    """
+    statements = []
+    with capture_statements() as captured:
+        try:
+            yield statements
+        finally:
+            statements.extend(statement for statement, _ in captured)
+
+
+@contextmanager
+def assert_max_queries(limit, label="block"):
+    """Fail with AssertionError if the block runs more than `limit` statements.
+
+    Usage in a test:
+
+        with app.app_context(), assert_max_queries(4, "details"):
+            client.get("/details/1")
+    """
+    with count_queries() as statements:
+        yield statements
+    if len(statements) > limit:
+        listing = "\n".join(f"  {i}. {sql.strip()}" for i, sql in enumerate(statements, 1))
+        raise AssertionError(f"{label} ran {len(statements)} queries (budget {limit}):\n{listing}")
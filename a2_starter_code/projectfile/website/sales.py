@@ -0,0 +1,93 @@
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from . import db
+from .models import DailySales, Event, OrderHistory, Ticket
+
+
+# Organiser sales reporting reads the daily_sales rollup, never the orders
+# table, so a dashboard costs O(days x tiers) however many orders there are.
+#
+# Each row is the net change on one day for one tier: bookings add to the
+# day they happen, cancellations subtract from the day they happen.
+
+
+def record_sale(event_id, ticket_id, tickets, revenue):
+    """Add a booking (or, with negative amounts, a cancellation) to today's row.
+
+    One upsert, run inside the caller's booking transaction.
+    """
+    statement = sqlite_insert(DailySales).values(
+        event_id=event_id, ticket_id=ticket_id, day=datetime.utcnow().date(),
+        tickets=tickets, revenue=revenue,
+    )
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=[DailySales.ticket_id, DailySales.day],
+        set_={
+            "tickets": DailySales.tickets + statement.excluded.tickets,
+            "revenue": DailySales.revenue + statement.excluded.revenue,
+        },
+    ))
+
+
+def rebuild_sales_rollup(event_id=None):
+    """Recompute daily_sales from live and archived orders, for one event or all of them.
+
+    Orders only keep what is still booked and when each was first placed, so
+    the rebuilt rows put every order's remaining tickets on its order date.
+    Per-tier and per-event totals come out exact; the day-by-day history of
+    top-ups and cancellations is lost. Does not commit. Returns the row count.
+    """
+    scope = [OrderHistory.event_id == event_id] if event_id is not None else []
+    db.session.execute(
+        delete(DailySales).where(*([DailySales.event_id == event_id] if event_id is not None else []))
+    )
+    # Live and archived orders both count
+    day = func.date(OrderHistory.order_date)
+    totals = (
+        select(OrderHistory.event_id, OrderHistory.ticket_id, day,
+               func.sum(OrderHistory.quantity), func.sum(OrderHistory.price))
+        .where(OrderHistory.quantity > 0, *scope)
+        .group_by(OrderHistory.event_id, OrderHistory.ticket_id, day)
+    )
+    return db.session.execute(
+        insert(DailySales).from_select(["event_id", "ticket_id", "day", "tickets", "revenue"], totals)
+    ).rowcount
+
+
+def _totals():
+    return func.sum(DailySales.tickets).label("tickets"), func.sum(DailySales.revenue).label("revenue")
+
+
+def sales_by_event(user_id):
+    """(event id, title, event date, tickets, revenue) for each of an organiser's events."""
+    return db.session.execute(
+        select(Event.id, Event.title, Event.event_date, *_totals())
+        .join(DailySales, DailySales.event_id == Event.id)
+        .where(Event.user_id == user_id)
+        .group_by(Event.id)
+        .order_by(Event.event_date.desc(), Event.id)
+    ).all()
+
+
+def sales_by_tier(event_id):
+    """(ticket type, price, tickets, revenue) per tier of one event."""
+    return db.session.execute(
+        select(Ticket.ticket_type, Ticket.price, *_totals())
+        .join(DailySales, DailySales.ticket_id == Ticket.id)
+        .where(DailySales.event_id == event_id)
+        .group_by(Ticket.id)
+        .order_by(Ticket.id)
+    ).all()
+
+
+def sales_by_day(event_id):
+    """(day, tickets, revenue) for one event, oldest day first."""
+    return db.session.execute(
+        select(DailySales.day, *_totals())
+        .where(DailySales.event_id == event_id)
+        .group_by(DailySales.day)
+        .order_by(DailySales.day)
+    ).all()
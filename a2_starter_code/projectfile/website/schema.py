@@ -0,0 +1,43 @@
+from sqlalchemy import inspect, text
+
+from . import db
+
+
+def add_missing_columns(table, columns):
+    """ALTER TABLE ADD COLUMN for each {name: ddl} the existing table lacks.
+
+    `db.create_all()` never alters existing tables, so columns added to a
+    model after a database was created are patched in here. Returns the names
+    of the columns that were added.
+    """
+    inspector = inspect(db.session.connection())
+    if not inspector.has_table(table):
+        return []
+    existing = {column["name"] for column in inspector.get_columns(table)}
+    added = []
+    for name, ddl in columns.items():
+        if name not in existing:
+            db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+            added.append(name)
+    return added
+
+
+def create_missing_indexes(table, names=None):
+    """Create a model table's indexes (or just `names`) that the database lacks.
+
+    Indexes over columns the database doesn't have yet are skipped; the
+    migration that adds those columns creates them. Returns the names created.
+    """
+    connection = db.session.connection()
+    inspector = inspect(connection)
+    if not inspector.has_table(table.name):
+        return []
+    columns = {column["name"] for column in inspector.get_columns(table.name)}
+    indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+    created = []
+    for index in table.indexes:
+        if (names is None or index.name in names) and index.name not in indexes \
+                and {column.name for column in index.columns} <= columns:
+            index.create(connection)
+            created.append(index.name)
+    return created
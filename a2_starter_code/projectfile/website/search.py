@@ -0,0 +1,181 @@
+import re
+from contextlib import contextmanager
+
+from flask import current_app
+from sqlalchemy import column, literal_column, table, text
+
+from . import db
+
+
+# FTS5 index over the searchable event columns, kept in sync by triggers.
+# It is an external-content table, so the text itself still lives in `events`.
+FTS_COLUMNS = ("title", "description", "venue", "genre")
+# Prefix lengths with their own index. A prefix term of any other length
+# (e.g. "zeppelin"* beyond 10 letters) must merge every matching document
+# before returning the first, so common words stay within these lengths.
+FTS_PREFIXES = "2 3 4 5 6 7 8 9 10"
+
+# (event_date, id) packed into one integer that sorts the same way. It is the
+# events_fts rowid, so the index hands matches back soonest first and a page
+# of results stops reading once it has its rows, however common the term.
+SEARCH_KEY_SQL = "(CAST(julianday(event_date) AS INTEGER) << 32) + id"
+SEARCH_KEY_COLUMN = f"ALTER TABLE events ADD COLUMN search_key INTEGER GENERATED ALWAYS AS ({SEARCH_KEY_SQL}) VIRTUAL"
+SEARCH_KEY_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS ix_events_search_key ON events (search_key)"
+
+FTS_INSERT_TRIGGER = f"""
+    CREATE TRIGGER IF NOT EXISTS events_fts_ai AFTER INSERT ON events BEGIN
+        INSERT INTO events_fts(rowid, {", ".join(FTS_COLUMNS)})
+        VALUES (new.search_key, {", ".join("new." + c for c in FTS_COLUMNS)});
+    END
+    """
+
+FTS_TRIGGERS = ("events_fts_ai", "events_fts_ad", "events_fts_au")
+
+FTS_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+        {", ".join(FTS_COLUMNS)},
+        content='events', content_rowid='search_key',
+        tokenize='unicode61 remove_diacritics 2', prefix='{FTS_PREFIXES}'
+    )
+    """,
+    FTS_INSERT_TRIGGER,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS events_fts_ad AFTER DELETE ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, {", ".join(FTS_COLUMNS)})
+        VALUES ('delete', old.search_key, {", ".join("old." + c for c in FTS_COLUMNS)});
+    END
+    """,
+    # Only fire when an indexed column or the date (part of the rowid) changes,
+    # so booking counter updates skip it
+    f"""
+    CREATE TRIGGER IF NOT EXISTS events_fts_au AFTER UPDATE OF event_date, {", ".join(FTS_COLUMNS)} ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, {", ".join(FTS_COLUMNS)})
+        VALUES ('delete', old.search_key, {", ".join("old." + c for c in FTS_COLUMNS)});
+        INSERT INTO events_fts(rowid, {", ".join(FTS_COLUMNS)})
+        VALUES (new.search_key, {", ".join("new." + c for c in FTS_COLUMNS)});
+    END
+    """,
+]
+
+# Lightweight handles for querying the virtual table and the key column, which
+# exist only on SQLite and so are not part of db.metadata
+events_fts = table("events_fts", column("rowid"), column("rank"), column("events_fts"))
+event_search_key = literal_column("events.search_key")
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def search_index_exists():
+    if db.engine.dialect.name != "sqlite":
+        return False
+    return db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'events_fts'")
+    ).first() is not None
+
+
+def _search_index_current():
+    """True if events_fts has today's key and prefixes (older ones used the event id)."""
+    sql = db.session.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'events_fts'")
+    ).scalar() or ""
+    return "content_rowid='search_key'" in sql and f"prefix='{FTS_PREFIXES}'" in sql
+
+
+def _add_search_key():
+    # table_xinfo, unlike table_info, lists generated columns
+    columns = {row[1] for row in db.session.execute(text("PRAGMA table_xinfo(events)"))}
+    if "search_key" not in columns:
+        db.session.execute(text(SEARCH_KEY_COLUMN))
+    db.session.execute(text(SEARCH_KEY_INDEX))
+
+
+def create_search_index():
+    """Create the search key, FTS5 table and triggers, back-filling the index when new.
+
+    An older index (keyed by event id, fewer prefixes) is dropped and
+    rebuilt. Does not commit; run through the migrations in migrations.py.
+    """
+    if db.engine.dialect.name != "sqlite":
+        return False
+    existed = search_index_exists()
+    if existed and not _search_index_current():
+        for trigger in FTS_TRIGGERS:
+            db.session.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+        db.session.execute(text("DROP TABLE events_fts"))
+        existed = False
+    _add_search_key()
+    for statement in FTS_SCHEMA:
+        db.session.execute(text(statement))
+    if not existed:
+        rebuild_search_index()
+    return True
+
+
+def rebuild_search_index():
+    db.session.execute(text("INSERT INTO events_fts(events_fts) VALUES ('rebuild')"))
+
+
+def index_inserted_events(first_id, last_id):
+    """Bulk-add a freshly inserted id range to the index (see without_insert_trigger)."""
+    db.session.execute(
+        text(f"INSERT INTO events_fts(rowid, {', '.join(FTS_COLUMNS)}) "
+             f"SELECT search_key, {', '.join(FTS_COLUMNS)} FROM events WHERE id BETWEEN :first AND :last"),
+        {"first": first_id, "last": last_id},
+    )
+
+
+@contextmanager
+def without_insert_trigger():
+    """Suspend the per-row index trigger inside the current transaction.
+
+    For bulk loads, which then call index_inserted_events() once per batch.
+    SQLite DDL is transactional, so other connections never see the trigger
+    missing; it is restored before the transaction commits.
+    """
+    db.session.execute(text("DROP TRIGGER IF EXISTS events_fts_ai"))
+    try:
+        yield
+    finally:
+        db.session.execute(text(FTS_INSERT_TRIGGER))
+
+
+def search_enabled():
+    enabled = current_app.extensions.get("events_fts")
+    if enabled is None:
+        # Checked once per process, on first use rather than at startup
+        enabled = current_app.extensions["events_fts"] = search_index_exists()
+    return enabled
+
+
+def _prefix_terms(value):
+    """Turn free text into quoted FTS5 prefix terms, e.g. 'pearl ja' -> '"pearl"* "ja"*'."""
+    return " ".join(f'"{word}"*' for word in _WORD.findall(value))
+
+
+def match_expression(search_query="", location=""):
+    """Build an FTS5 MATCH string for the /events search and location boxes."""
+    clauses = []
+    terms = _prefix_terms(search_query)
+    if terms:
+        clauses.append(f"({terms})")
+    venue_terms = _prefix_terms(location)
+    if venue_terms:
+        clauses.append(f"venue : ({venue_terms})")
+    return " AND ".join(clauses)
+
+
+def search_events(query, expression, ranked=False):
+    """Narrow an Event query to the events matching an FTS5 expression.
+
+    Returns (query, sort_columns) for keyset_page. By default matches come
+    soonest first, in index order, so a page costs about as much as the rows
+    it reads. ranked=True orders them best first by bm25 instead, which has
+    to score and sort every match before the first row comes back.
+    """
+    query = query.join(events_fts, events_fts.c.rowid == event_search_key).filter(
+        events_fts.c.events_fts.op("MATCH")(expression)
+    )
+    if ranked:
+        return query, [events_fts.c.rank, events_fts.c.rowid]
+    return query, [events_fts.c.rowid]
@@ -0,0 +1,234 @@
+import os
+import random
+import time as clock
+from array import array
+from datetime import date, datetime, time, timedelta
+
+from flask import current_app
+from sqlalchemy import bindparam, func, select, update
+
+from . import db
+from .importer import BATCH_SIZE, batched, bulk_insert, insert_batch
+from .models import Comment, Event, EventStatus, Genre, OrganisationType, Order, Ticket, User
+from .passwords import hash_password
+from .sales import rebuild_sales_rollup
+
+
+# Synthetic data for load testing. The same seed and anchor date always give
+# the same rows; event dates spread a year either side of the anchor so both
+# the upcoming and history pages have plenty to show.
+
+SEED_PASSWORD = "Password1!"  # every seeded user logs in with this
+DAYS_EACH_SIDE = 365
+
+BANDS = ["Pearl Jam", "Metallica", "Led Zeppelin", "The Doors", "Black Sabbath", "Nirvana",
+         "Soundgarden", "Fleetwood Mac", "Lynyrd Skynyrd", "Pink Floyd", "AC/DC", "Creedence",
+         "Alice in Chains", "Deep Purple", "Iron Maiden", "The Allman Brothers", "Queen", "Rush"]
+KINDS = ["Tribute", "Live", "Revival", "Experience", "Anthology", "Unplugged", "Tour", "Night"]
+VENUES = ["Brisbane Riverstage", "Fortitude Music Hall", "The Tivoli", "Eatons Hill",
+          "Sydney Opera House", "Rod Laver Arena", "Enmore Theatre", "The Triffid",
+          "Forum Melbourne", "Hordern Pavilion", "Metro Theatre", "The Gov"]
+WORDS = ["loud", "electric", "acoustic", "legendary", "classic", "heavy", "riffs", "encore",
+         "anthems", "vinyl", "amplified", "psychedelic", "southern", "grunge", "night", "tour"]
+TIERS = [("General Admission", 45, 120), ("VIP", 150, 400), ("Balcony", 60, 180)]
+COMMENTS = ["Can't wait for this one!", "Saw them last year, unreal.", "Is there parking nearby?",
+            "Best night of the year.", "Will they play the deep cuts?", "Tickets booked, see you there.",
+            "Sound was a bit muddy at the back.", "Bringing the whole crew."]
+
+
+class SeedingError(RuntimeError):
+    """The target database can't be seeded as asked."""
+
+
+def _upload_photos():
+    folder = current_app.config["UPLOAD_FOLDER"]
+    try:
+        names = os.listdir(folder)
+    except FileNotFoundError:
+        return [None]
+    photos = sorted(name for name in names if name.lower().endswith((".jpg", ".jpeg", ".png", ".webp")))
+    return photos or [None]
+
+
+def _events(rng, count, user_count, anchor):
+    """Yield importer-shaped (event values, ticket rows, image filenames)."""
+    photos = _upload_photos()
+    genres, organisations = list(Genre), list(OrganisationType)
+    for n in range(count):
+        band = rng.choice(BANDS)
+        event_date = anchor + timedelta(days=rng.randint(-DAYS_EACH_SIDE, DAYS_EACH_SIDE))
+        created_at = datetime.combine(min(event_date, anchor) - timedelta(days=rng.randint(30, 180)), time(9))
+        roll = rng.random()
+        if roll < 0.03:
+            status = EventStatus.CANCELLED
+        elif event_date < anchor:
+            status = EventStatus.INACTIVE  # as the status sweeper would have left it
+        else:
+            status = EventStatus.OPEN
+        start = rng.randint(17, 21)
+        tiers = rng.sample(TIERS, rng.randint(1, len(TIERS)))
+        tickets = [{"ticket_type": name, "price": float(rng.randint(low, high))} for name, low, high in tiers]
+        event = {
+            "title": f"{band} {rng.choice(KINDS)} {n}",
+            "event_date": event_date,
+            "start_time": time(start),
+            "end_time": time(min(start + 4, 23)),
+            "venue": rng.choice(VENUES),
+            "genre": rng.choice(genres),
+            "organisation": rng.choice(organisations),
+            "status": status,
+            "attendees": rng.randrange(200, 5000, 50),
+            "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(15, 40))) + f" {band}",
+            "photo": rng.choice(photos),
+            "user_id": rng.randint(1, user_count),
+            "tickets_sold": 0,
+            "min_price": min(ticket["price"] for ticket in tickets),
+            "comment_count": 0,
+            "version": 1,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+        yield event, tickets, []
+
+
+def _users(count, password_hash):
+    for n in range(1, count + 1):
+        yield {
+            "username": f"user{n}",
+            "email": f"user{n}@example.com",
+            "phone_number": f"04{n:08d}"[-10:],
+            "password_hash": password_hash,
+        }
+
+
+def _commit_in_batches(table, rows, batch_size, progress, label):
+    for batch in batched(rows, batch_size):
+        bulk_insert(table, batch)
+        db.session.commit()
+        progress(label, len(batch))
+
+
+def seed_database(users, events, orders, comments, seed=207, anchor=None,
+                  batch_size=BATCH_SIZE * 10, on_progress=None):
+    """Fill an empty database with synthetic users, events, orders and comments.
+
+    Event and tier counters and the daily sales rollup are set from the
+    generated orders, and no event is sold past its capacity (so fewer
+    orders than asked for can result on a small catalogue). Returns totals
+    as a dict.
+    """
+    if db.session.scalar(select(func.count()).select_from(User)):
+        raise SeedingError("The database already has users; seed into an empty database.")
+    if users < 1:
+        raise SeedingError("At least one user is needed.")
+
+    rng = random.Random(seed)
+    anchor = anchor or date.today()
+    started = clock.perf_counter()
+    totals = {"users": 0, "events": 0, "tickets": 0, "orders": 0, "comments": 0}
+
+    def progress(label, count):
+        totals[label] += count
+        if on_progress:
+            on_progress(label, totals[label], clock.perf_counter() - started)
+
+    _commit_in_batches(User.__table__, _users(users, hash_password(SEED_PASSWORD)), batch_size, progress, "users")
+
+    for batch in batched(_events(rng, events, users, anchor), BATCH_SIZE):
+        inserted, tickets, _ = insert_batch(batch)
+        totals["tickets"] += tickets
+        progress("events", inserted)
+
+    # Tiers and capacity of everything that can be booked, indexed by event id
+    tiers = {}
+    for ticket_id, event_id, price in db.session.execute(select(Ticket.id, Ticket.event_id, Ticket.price)):
+        tiers.setdefault(event_id, []).append((ticket_id, price))
+    capacity = array("i", [0]) * (events + 1)
+    event_dates = {}
+    bookable = []
+    for event_id, attendees, event_date, status in db.session.execute(
+            select(Event.id, Event.attendees, Event.event_date, Event.status)):
+        if status != EventStatus.CANCELLED and event_id in tiers and event_id <= events:
+            capacity[event_id] = attendees
+            event_dates[event_id] = event_date
+            bookable.append(event_id)
+    sold = array("i", [0]) * (events + 1)
+    ticket_sold = {}
+
+    def user_orders():
+        """Each user books a handful of distinct events, so (user, event, tier) stays unique."""
+        if not bookable:
+            return
+        per_user = orders / users
+        for user_id in range(1, users + 1):
+            booked = set()
+            wanted = min(len(bookable), int(per_user) + (rng.random() < per_user % 1))
+            for _ in range(wanted):
+                event_id = rng.choice(bookable)
+                quantity = rng.randint(1, 4)
+                if event_id in booked or sold[event_id] + quantity > capacity[event_id]:
+                    continue
+                booked.add(event_id)
+                sold[event_id] += quantity
+                ticket_id, price = rng.choice(tiers[event_id])
+                ticket_sold[ticket_id] = ticket_sold.get(ticket_id, 0) + quantity
+                ordered_on = event_dates[event_id] - timedelta(days=rng.randint(1, 90))
+                yield {
+                    "user_id": user_id,
+                    "event_id": event_id,
+                    "ticket_id": ticket_id,
+                    "quantity": quantity,
+                    "price": price * quantity,
+                    "order_date": datetime.combine(min(ordered_on, anchor), time(rng.randint(8, 22))),
+                }
+
+    _commit_in_batches(Order.__table__, user_orders(), batch_size, progress, "orders")
+
+    # Counters and SOLD_OUT, as the booking path would have left them
+    events_table, tickets_table = Event.__table__, Ticket.__table__
+    sold_rows = [{"event_id": event_id, "sold": sold[event_id]} for event_id in bookable if sold[event_id]]
+    for batch in batched(sold_rows, batch_size):
+        db.session.execute(
+            update(events_table).where(events_table.c.id == bindparam("event_id"))
+            .values(tickets_sold=bindparam("sold")), batch)
+    for batch in batched(({"ticket_id": ticket_id, "sold": count} for ticket_id, count in ticket_sold.items()),
+                         batch_size):
+        db.session.execute(
+            update(tickets_table).where(tickets_table.c.id == bindparam("ticket_id"))
+            .values(tickets_sold=bindparam("sold")), batch)
+    db.session.execute(
+        update(events_table)
+        .where(events_table.c.status == EventStatus.OPEN, events_table.c.tickets_sold >= events_table.c.attendees)
+        .values(status=EventStatus.SOLD_OUT)
+    )
+    rebuild_sales_rollup()
+    db.session.commit()
+
+    comment_count = array("i", [0]) * (events + 1)
+    popular = rng.sample(range(1, events + 1), max(1, events // 100)) if events else []
+
+    def event_comments():
+        """A third of the comments pile onto the top 1% of events, as on a real site."""
+        if not events:
+            return
+        for _ in range(comments):
+            event_id = rng.choice(popular) if rng.random() < 0.3 else rng.randint(1, events)
+            comment_count[event_id] += 1
+            yield {
+                "content": rng.choice(COMMENTS),
+                "created_at": datetime.combine(anchor - timedelta(days=rng.randint(0, DAYS_EACH_SIDE)),
+                                               time(rng.randint(0, 23), rng.randint(0, 59))),
+                "user_id": rng.randint(1, users),
+                "event_id": event_id,
+            }
+
+    _commit_in_batches(Comment.__table__, event_comments(), batch_size, progress, "comments")
+    counted = ({"event_id": event_id, "count": count} for event_id, count in enumerate(comment_count) if count)
+    for batch in batched(counted, batch_size):
+        db.session.execute(
+            update(events_table).where(events_table.c.id == bindparam("event_id"))
+            .values(comment_count=bindparam("count")), batch)
+    db.session.commit()
+
+    totals["seconds"] = clock.perf_counter() - started
+    return totals
@@ -0,0 +1,44 @@
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import update
+
+from . import db
+from .archive import archive_past_orders
+from .models import Event, EventStatus
+
+
+def sweep_past_events(today=None):
+    """Mark every past event INACTIVE in one bulk UPDATE. Returns the row count."""
+    today = today or datetime.now().date()
+    result = db.session.execute(
+        update(Event)
+        .where(Event.event_date < today, Event.status != EventStatus.INACTIVE)
+        .values(status=EventStatus.INACTIVE, **Event.bumped_version())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def start_status_sweeper(app, interval):
+    """Run sweep_past_events and archive_past_orders every `interval` seconds on a daemon thread."""
+    def loop():
+        while True:
+            with app.app_context():
+                try:
+                    swept = sweep_past_events()
+                    if swept:
+                        app.logger.info("Status sweeper marked %d past events INACTIVE", swept)
+                    archived = archive_past_orders()
+                    if archived:
+                        app.logger.info("Status sweeper archived %d past-event orders", archived)
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception("Status sweep failed")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="status-sweeper", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,29 @@
+import os
+
+from jinja2 import FileSystemBytecodeCache
+
+
+def bytecode_cache_dir(app):
+    return os.path.join(app.instance_path, "jinja-cache")
+
+
+def precompile_templates(app):
+    """Compile every template in website/templates into the Jinja caches.
+
+    With a bytecode cache configured this also writes the compiled code to
+    disk, so the next process start skips parsing. Returns the count compiled.
+    """
+    names = app.jinja_loader.list_templates()
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+def init_templates(app):
+    """Set up the Jinja bytecode cache and precompile templates, as configured."""
+    if app.config["TEMPLATE_BYTECODE_CACHE"]:
+        directory = bytecode_cache_dir(app)
+        os.makedirs(directory, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+    if app.config["PRECOMPILE_TEMPLATES"]:
+        precompile_templates(app)
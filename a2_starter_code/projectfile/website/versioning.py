@@ -0,0 +1,51 @@
+from datetime import datetime
+from itertools import chain
+
+from sqlalchemy import event as sa_event, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+
+from .models import Event, EventImage, Ticket
+
+
+# Child rows whose changes count as a change to their event
+VERSIONED_CHILDREN = (Ticket, EventImage)
+
+
+def _bump(event):
+    event.version = (event.version or 0) + 1
+    event.updated_at = datetime.utcnow()
+
+
+@sa_event.listens_for(Session, "before_flush")
+def _bump_event_versions(session, flush_context, instances):
+    """Move Event.version on ORM writes to an event, its tickets or its images.
+
+    Bulk UPDATEs bypass this; they add Event.bumped_version() to their values.
+    """
+    changed = set()
+    child_event_ids = set()
+    for obj in chain(session.dirty, session.new, session.deleted):
+        if isinstance(obj, Event):
+            if obj in session.dirty and session.is_modified(obj):
+                changed.add(obj)
+        elif isinstance(obj, VERSIONED_CHILDREN):
+            parent = obj.__dict__.get("event")  # only if already loaded
+            if parent is None and obj.event_id is not None:
+                parent = session.identity_map.get(identity_key(Event, obj.event_id))
+            if parent is not None:
+                changed.add(parent)
+            elif obj.event_id is not None:
+                child_event_ids.add(obj.event_id)
+
+    for event in changed:
+        if event not in session.deleted:
+            _bump(event)
+
+    # Parents that aren't loaded in this session are bumped in SQL
+    unloaded = child_event_ids - {event.id for event in changed}
+    if unloaded:
+        session.execute(
+            update(Event).where(Event.id.in_(unloaded)).values(**Event.bumped_version())
+            .execution_options(synchronize_session=False)
+        )
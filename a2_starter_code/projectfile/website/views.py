@@ -1,9 +1,16 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify
 from flask_login import login_required, logout_user, current_user
 from flask_bcrypt import generate_password_hash
 from .forms import RegisterForm
-from .models import User, Comment, Ticket, Event, EventStatus, Genre, EventImage, Order
+from .models import User, Comment, Ticket, Event, EventStatus, Genre, EventImage, Order, EVENT_PAGE_LOADS
 from . import db
+from .homepage import homepage_cache
+from .catalogue import facet_counts, filtered_events
+from .compression import render_page
+from .http_cache import cached_page, catalogue_state, event_state, facet_window, facet_window_start, newest
+from .images import queue_event_images
+from .pagination import keyset_page, page_url, requested_page_size
+from .sales import sales_by_day, sales_by_event, sales_by_tier
 from werkzeug.utils import secure_filename
 import os
 from datetime import datetime
@@ -15,132 +22,84 @@ main_bp = Blueprint('main', __name__)
 
 @main_bp.route('/')
 def index():
-    today = datetime.now().date()
-
-    # Mark past events as INACTIVE
-    past_events = Event.query.filter(
-        Event.event_date < today, Event.status != EventStatus.INACTIVE
-    ).all()
-    for event in past_events:
-        event.status = EventStatus.INACTIVE
-    if past_events:
-        db.session.commit()
-
-    # Calculate tickets sold per event using the Order table
-    tickets_sold_subquery = (
-        db.session.query(
-            Order.event_id,
-            func.coalesce(func.sum(Order.quantity), 0).label("tickets_sold")
-        )
-        .group_by(Order.event_id)
-        .subquery()
-    )
-
-    # Trending events (most tickets sold, not sold out, upcoming)
-    trending_events = (
-        db.session.query(Event, tickets_sold_subquery.c.tickets_sold)
-        .outerjoin(tickets_sold_subquery, Event.id == tickets_sold_subquery.c.event_id)
-        .filter(Event.event_date >= today)  # only upcoming
-        .filter(
-            (tickets_sold_subquery.c.tickets_sold < Event.attendees)
-            | (tickets_sold_subquery.c.tickets_sold.is_(None))
-        )  # not sold out
-        .order_by(tickets_sold_subquery.c.tickets_sold.desc().nullslast())  # most sold first
-        .limit(6)
-        .all()
-    )
-
-    # Upcoming events
-    upcoming_events = (
-        Event.query.filter(Event.event_date >= today, Event.status != EventStatus.INACTIVE)
-        .order_by(Event.event_date.asc())
-        .limit(6)
-        .all()
-    )
-
-    # Previous (inactive) events
-    previous_events = (
-        Event.query.filter(Event.status == EventStatus.INACTIVE)
-        .order_by(Event.event_date.desc())
-        .all()
-    )
-
-    # Genre-based selections
-    grunge_events = Event.query.filter_by(genre=Genre.GRUNGE).limit(2).all()
-    seventies_events = Event.query.filter_by(genre=Genre.SEVENTIES).limit(2).all()
-    southern_rock_events = Event.query.filter_by(genre=Genre.SOUTHERN).limit(2).all()
-    metal_events = Event.query.filter_by(genre=Genre.METAL).limit(2).all()
-
-    # Extract just the Event objects for rendering
-    trending_events = [event for event, _ in trending_events]
-
-    return render_template(
-        "index.html",
-        trending_events=trending_events,
-        upcoming_events=upcoming_events,
-        previous_events=previous_events,
-        grunge_events=grunge_events,
-        seventies_events=seventies_events,
-        southern_rock_events=southern_rock_events,
-        metal_events=metal_events,
-    )
+    # Shelves come from the process-local snapshot; SQL only runs when it is rebuilt
+    shelves = homepage_cache.get()
+    return render_page("index.html", **shelves)
 
 
 @main_bp.route('/events')
 def events():
-    query = Event.query
+    return cached_page(_events_validators, _render_events)
 
-    # Get filters
-    search_query = request.args.get('q', '').strip()
-    max_price = request.args.get('max_price', type=float)
-    genres = request.args.getlist('genre')
-    status = request.args.get('status')
-    location = request.args.get('location', '').strip()
 
-    # Apply filters
-    if search_query:
-        query = query.filter(Event.title.ilike(f"%{search_query}%"))
+def _events_validators():
+    # Facet counts may be FACET_CACHE_SECONDS old, so the validators also roll over with them
+    etag, last_modified = catalogue_state()
+    return f"{etag}-f{facet_window()}", newest(last_modified, facet_window_start())
 
-    if max_price is not None:
-        query = query.outerjoin(Ticket).filter((Ticket.price <= max_price) | (Ticket.id.is_(None)))
 
-    # Genres filter fixer
-    if genres:
-        genre_map = {
-            "70s": "SEVENTIES",
-            "80s": "EIGHTIES",
-            "90s": "NINETIES",
-            "00s": "TWO_THOUSANDS"
-        }
-        enum_genres = []
-        for g in genres:
-            key = genre_map.get(g.lower(), g.upper())
-            if key in Genre.__members__:
-                enum_genres.append(Genre[key])
-        query = query.filter(Event.genre.in_(enum_genres))
+def _render_events():
+    query, sort_columns = filtered_events(request.args)
+    page = keyset_page(query, sort_columns, cursor=request.args.get('cursor'),
+                       per_page=requested_page_size())
 
-    if status:
-        status_key = status.replace(" ", "").upper()
-        if status_key in EventStatus.__members__:
-            query = query.filter(Event.status == EventStatus[status_key])
+    if request.args.get('format') == 'json':
+        return jsonify(
+            events=[_event_summary(event) for event in page.items],
+            next_cursor=page.next_cursor,
+            prev_cursor=page.prev_cursor,
+        )
 
-    if location:
-        query = query.filter(Event.venue.ilike(f"%{location}%"))
+    return render_page("events.html", events=page.items, facets=facet_counts(request.args),
+                       next_url=page_url('main.events', page.next_cursor),
+                       prev_url=page_url('main.events', page.prev_cursor))
 
-    events = query.distinct().order_by(Event.event_date.asc()).all()
 
-    return render_template("events.html", events=events)
+# Previous (inactive) events, newest first
+@main_bp.route('/previous-events')
+def previous_events():
+    query = Event.query.filter(Event.has_current_status(EventStatus.INACTIVE, datetime.now().date()))
+    page = keyset_page(query, [Event.event_date, Event.id], cursor=request.args.get('cursor'),
+                       per_page=requested_page_size(), descending=True)
 
+    if request.args.get('format') == 'json':
+        return jsonify(
+            events=[_event_summary(event) for event in page.items],
+            next_cursor=page.next_cursor,
+            prev_cursor=page.prev_cursor,
+        )
+
+    return render_template("previous.html", events=page.items,
+                           next_url=page_url('main.previous_events', page.next_cursor),
+                           prev_url=page_url('main.previous_events', page.prev_cursor))
+
+
+def _event_summary(event):
+    return {
+        "id": event.id,
+        "title": event.title,
+        "event_date": event.event_date.isoformat(),
+        "venue": event.venue,
+        "genre": event.genre.value if event.genre else None,
+        "status": event.current_status.value,
+        "photo": event.photo,
+        "url": url_for('main.details', event_id=event.id),
+    }
 
 
 # Event detail page
 @main_bp.route('/details/<int:event_id>')
 def details(event_id):
-    event = Event.query.get_or_404(event_id)
-    comments = Comment.query.filter_by(event_id=event.id).order_by(Comment.created_at.desc()).all()
+    # Anonymous revalidations are answered from the version stamp alone
+    return cached_page(lambda: event_state(event_id), lambda: _render_details(event_id))
+
+
+def _render_details(event_id):
+    event = Event.query.options(*EVENT_PAGE_LOADS).filter_by(id=event_id).first_or_404()
+    # Comments are fetched page by page from event.comments once the page is up
     user_orders = []
     tickets = event.tickets
-    return render_template("details.html", event=event, comments=comments, tickets=tickets, user_orders=user_orders,
+    return render_template("details.html", event=event, tickets=tickets, user_orders=user_orders,
                            datetime=datetime)
 
 
@@ -186,6 +145,19 @@ def update_event():
             flash("Invalid date or time format.", "danger")
             return redirect(url_for('main.update_event', event_id=selected_event.id))
 
+        # Waiting room rate; blank turns the queue off
+        admission_rate = request.form.get('admission_rate', '').strip()
+        if admission_rate:
+            try:
+                selected_event.admission_rate = int(admission_rate)
+            except ValueError:
+                selected_event.admission_rate = 0
+            if selected_event.admission_rate < 1:
+                flash('Buyers admitted per minute must be a whole number above zero.', 'danger')
+                return redirect(url_for('main.update_event', event_id=selected_event.id))
+        else:
+            selected_event.admission_rate = None
+
         # Update existing tickets
         for ticket in selected_event.tickets:
             ticket_type = request.form.get(f"existing_ticket_type_{ticket.id}")
@@ -216,6 +188,7 @@ def update_event():
             filename = secure_filename(photo_file.filename)
             photo_file.save(os.path.join(current_app.config["UPLOAD_FOLDER"], filename))
             selected_event.photo = filename
+            selected_event.photo_variant = None
 
         # Carousel Images
         carousel_files = request.files.getlist("carousel_images")
@@ -229,6 +202,8 @@ def update_event():
                     db.session.add(img)
 
         db.session.commit()
+        # Raw files are saved; resizing happens off the request
+        queue_event_images(current_app._get_current_object(), selected_event)
         flash('Event updated successfully!', 'success')
         return redirect(url_for('main.update_event', event_id=selected_event.id))
 
@@ -237,6 +212,18 @@ def update_event():
 
 
 
+# Organiser sales dashboard; reads only the daily_sales rollup
+@main_bp.route('/update-event/sales')
+@login_required
+def sales_dashboard():
+    events = sales_by_event(current_user.id)
+    event_id = request.args.get('event_id', type=int)
+    selected_event = Event.query.filter_by(id=event_id, user_id=current_user.id).first() if event_id else None
+    tiers = sales_by_tier(selected_event.id) if selected_event else []
+    days = sales_by_day(selected_event.id) if selected_event else []
+    return render_template('sales.html', events=events, selected_event=selected_event, tiers=tiers, days=days)
+
+
 # Delete event
 @main_bp.route('/delete-event/<int:event_id>', methods=['POST'])
 @login_required
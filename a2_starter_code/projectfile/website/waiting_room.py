@@ -0,0 +1,88 @@
+import math
+import threading
+import time
+
+from flask import current_app, session
+from itsdangerous import BadSignature, URLSafeSerializer
+
+
+# Waiting room for on-sale spikes. An event with an admission_rate hands
+# each buyer a signed token holding their place and the time they may
+# start booking; slots are spaced 60 / rate seconds apart, so the writer
+# sees bookings at the rate the organiser chose rather than all at once.
+# Checking a token needs only the secret key, never the database.
+#
+# The schedule is process-local: with several worker processes, each admits
+# at the full rate.
+
+SESSION_KEY = "waiting_room"
+
+
+class WaitingRoom:
+    """Hands out the next admission slot for each event."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next = {}  # event_id -> (next free slot, next position)
+
+    def join(self, event_id, rate, now):
+        """Return (position, admit_at). Admission is immediate while the room is empty."""
+        with self._lock:
+            slot, position = self._next.get(event_id, (now, 0))
+            admit_at = max(slot, now)
+            self._next[event_id] = (admit_at + 60.0 / rate, position + 1)
+        return position, admit_at
+
+    def reset(self):
+        with self._lock:
+            self._next.clear()
+
+
+waiting_room = WaitingRoom()
+
+
+def _serializer():
+    return URLSafeSerializer(current_app.secret_key, salt="waiting-room")
+
+
+def token_state(token, event_id, user_id=None):
+    """("waiting", seconds to go, people ahead), ("admitted", seconds left, 0) or ("invalid", 0, 0).
+
+    An admission lasts WAITING_ROOM_ADMISSION_SECONDS; after that the token
+    is invalid and its holder has to queue again.
+    """
+    try:
+        token_event, token_user, _, admit_at, rate = _serializer().loads(token)
+    except (BadSignature, TypeError, ValueError):
+        return "invalid", 0, 0
+    if token_event != event_id or (user_id is not None and token_user != user_id):
+        return "invalid", 0, 0
+    now = time.time()
+    if now < admit_at:
+        return "waiting", admit_at - now, math.ceil((admit_at - now) * rate / 60.0)
+    remaining = admit_at + current_app.config["WAITING_ROOM_ADMISSION_SECONDS"] - now
+    if remaining <= 0:
+        return "invalid", 0, 0
+    return "admitted", remaining, 0
+
+
+def admission_token(event_id, user_id, rate):
+    """The user's token for this event, joining the queue if they hold no live one."""
+    tokens = session.get(SESSION_KEY, {})
+    token = tokens.get(str(event_id))
+    if token and token_state(token, event_id, user_id)[0] != "invalid":
+        return token
+
+    position, admit_at = waiting_room.join(event_id, rate, time.time())
+    token = _serializer().dumps([event_id, user_id, position, admit_at, rate])
+    # Only the live tokens are kept, so the session cookie stays small
+    tokens = {key: value for key, value in tokens.items()
+              if token_state(value, int(key), user_id)[0] != "invalid"}
+    tokens[str(event_id)] = token
+    session[SESSION_KEY] = tokens
+    return token
+
+
+def is_admitted(event_id, user_id):
+    token = session.get(SESSION_KEY, {}).get(str(event_id))
+    return bool(token) and token_state(token, event_id, user_id)[0] == "admitted"